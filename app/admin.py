@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from .models import (
     UserProfile, Article, ArticleAuthor, Journal, JournalEditor, Project, ProjectContributor,
-    ProjectPayment, MembershipRequest, DirectoryApplication, HallOfFameApplication, PlagiarismCheck,
+    ProjectPayment, MembershipRequest, DirectoryApplication, ResearchArea, HallOfFameApplication, PlagiarismCheck,
     PlagiarismWork, ThesisToArticle, ThesisToBook, ThesisToBookChapter, PowerPointPreparation,
     SiteSettings, Blog, NewsTag, NewsWriter, NewsArticle, NewsComment, NewsBookmark
 )
@@ -183,6 +183,18 @@ class DirectoryApplicationAdmin(admin.ModelAdmin):
         }),
     )
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Keep the research area tags in step with the edited text
+        form.instance.sync_research_areas()
+
+# Research Area Admin
+@admin.register(ResearchArea)
+class ResearchAreaAdmin(admin.ModelAdmin):
+    list_display = ('name', 'key', 'created_at')
+    search_fields = ('name', 'key')
+    readonly_fields = ('created_at',)
+
 # Hall of Fame Application Admin
 @admin.register(HallOfFameApplication)
 class HallOfFameApplicationAdmin(admin.ModelAdmin):
@@ -532,6 +544,11 @@ class NewsCommentAdmin(admin.ModelAdmin):
         }),
     )
     
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # likes/dislikes edited here bypass toggle_reaction
+        form.instance.refresh_reaction_counts()
+
     def get_likes_count(self, obj):
         return obj.get_likes_count()
     get_likes_count.short_description = 'Likes'
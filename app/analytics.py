@@ -0,0 +1,82 @@
+"""Daily rollups of the AnalyticsEvent log and the dashboard queries that read them"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Max, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from app.models import AnalyticsDaily, AnalyticsEvent
+
+# Daily rows per upsert, well under SQLite's bound-parameter limit
+ROLLUP_BATCH_SIZE = 500
+# Days raw events are kept after they are rolled up
+KEEP_DAYS = 90
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min), timezone.get_default_timezone())
+
+
+def first_complete_day(keep_days=KEEP_DAYS):
+    """Earliest day whose raw events are all still kept when pruning keeps ``keep_days`` days"""
+    return timezone.localdate(timezone.now() - timedelta(days=keep_days)) + timedelta(days=1)
+
+
+def rollup(since=None, keep_days=KEEP_DAYS):
+    """Recompute daily totals from ``since`` (default: the last rolled-up day) up to today.
+
+    Each day is summed from scratch and upserted, so rerunning is harmless and
+    the partial day left by the previous run is completed. An explicit
+    ``since`` is moved up to first_complete_day(), since recounting a day
+    whose events were partly pruned would overwrite its total with less.
+    Returns the number of daily rows written.
+    """
+    if since is None:
+        since = AnalyticsDaily.objects.aggregate(last=Max('day'))['last']
+    else:
+        since = max(since, first_complete_day(keep_days))
+    events = AnalyticsEvent.objects.all()
+    if since is not None:
+        events = events.filter(created_at__gte=_day_start(since))
+    totals = (
+        events.annotate(day=TruncDate('created_at'))
+        .values('object_type', 'object_id', 'event', 'day')
+        .annotate(total=Sum('count'))
+        .order_by()
+    )
+    rows = [
+        AnalyticsDaily(object_type=row['object_type'], object_id=row['object_id'],
+                       event=row['event'], day=row['day'], count=row['total'])
+        for row in totals
+    ]
+    AnalyticsDaily.objects.bulk_create(
+        rows,
+        batch_size=ROLLUP_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['object_type', 'object_id', 'event', 'day'],
+        update_fields=['count'],
+    )
+    return len(rows)
+
+
+def prune_events(keep_days=KEEP_DAYS):
+    """Delete raw events older than ``keep_days`` whose days are already rolled up"""
+    last = AnalyticsDaily.objects.aggregate(last=Max('day'))['last']
+    if last is None:
+        return 0
+    cutoff = min(_day_start(last), timezone.now() - timedelta(days=keep_days))
+    deleted, _ = AnalyticsEvent.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+def top_objects(model, event='view', days=7, limit=10):
+    """The ``limit`` rows of ``model`` with the most ``event``s over the last ``days`` days, as (object, total) pairs"""
+    since = timezone.localdate() - timedelta(days=days - 1)
+    totals = list(
+        AnalyticsDaily.objects.filter(object_type=model._meta.model_name, event=event, day__gte=since)
+        .values('object_id')
+        .annotate(total=Sum('count'))
+        .order_by('-total', 'object_id')[:limit]
+    )
+    objects = model._default_manager.in_bulk([row['object_id'] for row in totals])
+    return [(objects[row['object_id']], row['total']) for row in totals if row['object_id'] in objects]
@@ -0,0 +1,382 @@
+"""Article indexing certificates: the printed fields, PDF rendering and the on-disk cache of rendered files"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+
+TEMPLATE_PATH = Path(settings.BASE_DIR) / 'app' / 'static' / 'app' / 'docs' / 'cert.pdf'
+RECORDED_BY = 'Metascholar Limited'
+
+
+def article_fields(article, article_link):
+    """Everything printed on an article's certificate, as a dict of strings"""
+    authors = list(article.authors.all())
+    return {
+        'authors_names': ', '.join(author.name for author in authors) if authors else article.authors_names or 'N/A',
+        'article_number': f"SIS{article.id:06d}AI{article.created_at.strftime('%d%m%y') if article.created_at else '000000'}",
+        'recorded_by': RECORDED_BY,
+        'volume': article.volume or 'N/A',
+        'issue': article.issue or 'N/A',
+        'pages': article.pages or 'N/A',
+        'date_of_indexing': (article.created_at or datetime.now()).strftime('%B %d %Y'),
+        'article_link': article_link,
+        'article_title': article.title,
+    }
+
+
+# Page geometry of cert.pdf (US letter, in points) and the column the text starts at
+PAGE_WIDTH, PAGE_HEIGHT = 612.0, 792.0
+INCH = 72.0
+LEFT = 1.5 * INCH
+TOP = PAGE_HEIGHT - 3.5 * INCH
+LINE_HEIGHT = 22
+
+# Resource names of the two standard fonts the overlay uses, added to the template page's font dict
+FONTS = {
+    'Times-Roman': '/CertRoman',
+    'Times-Bold': '/CertBold',
+}
+
+# Text that is the same on every certificate: (font, size, x, y, text)
+LABELS = (
+    ('Times-Bold', 12, LEFT, TOP, 'Authors:'),
+    ('Times-Bold', 12, LEFT, TOP - LINE_HEIGHT, 'Article Number:'),
+    ('Times-Bold', 12, LEFT, TOP - LINE_HEIGHT * 2, 'Recorded By:'),
+    ('Times-Bold', 12, LEFT, TOP - LINE_HEIGHT * 3, 'URL:'),
+    ('Times-Roman', 12, LEFT + 0.45 * INCH, TOP - LINE_HEIGHT * 3, 'www.scholarindexing.com'),
+    ('Times-Bold', 12, LEFT, TOP - LINE_HEIGHT * 4, 'Volume:'),
+    ('Times-Bold', 12, 2.9 * INCH, TOP - LINE_HEIGHT * 4, 'Issue:'),
+    ('Times-Bold', 12, 4.7 * INCH, TOP - LINE_HEIGHT * 4, 'Pages:'),
+)
+
+# Where each single-line field is printed: field -> (font, size, x, y)
+FIELD_POSITIONS = {
+    'authors_names': ('Times-Roman', 12, LEFT + 0.85 * INCH, TOP),
+    'article_number': ('Times-Roman', 12, LEFT + 1.4 * INCH, TOP - LINE_HEIGHT),
+    'recorded_by': ('Times-Roman', 12, LEFT + 1.2 * INCH, TOP - LINE_HEIGHT * 2),
+    'volume': ('Times-Roman', 12, LEFT + 0.7 * INCH, TOP - LINE_HEIGHT * 4),
+    'issue': ('Times-Roman', 12, 2.9 * INCH + 0.55 * INCH, TOP - LINE_HEIGHT * 4),
+    'pages': ('Times-Roman', 12, 4.7 * INCH + 0.6 * INCH, TOP - LINE_HEIGHT * 4),
+}
+
+ACKNOWLEDGEMENT = (
+    'This certificate acknowledges that the article titled "{title}" has been successfully '
+    'indexed and recorded by Metascholar Limited.'
+)
+
+
+def layout(fields):
+    """Every piece of text on a certificate as ``(font, size, x, y, text)``, labels first"""
+    from reportlab.lib.utils import simpleSplit
+
+    operations = list(LABELS)
+    operations.extend((*FIELD_POSITIONS[name], fields[name]) for name in FIELD_POSITIONS)
+
+    # Acknowledgement wraps, and pushes the date and link down by its height
+    ack_y = TOP - LINE_HEIGHT * 5.2 - 20
+    ack_lines = simpleSplit(ACKNOWLEDGEMENT.format(title=fields['article_title']), 'Times-Bold', 13, PAGE_WIDTH - 3 * INCH)
+    operations.extend(('Times-Bold', 13, LEFT, ack_y - i * 16, line) for i, line in enumerate(ack_lines))
+
+    date_y = ack_y - len(ack_lines) * 16 - 25
+    operations.append(('Times-Bold', 12, LEFT, date_y, 'Date of Indexing:'))
+    operations.append(('Times-Roman', 12, LEFT + 1.25 * INCH, date_y, fields['date_of_indexing']))
+
+    link_y = date_y - LINE_HEIGHT
+    operations.append(('Times-Bold', 12, LEFT, link_y, 'Article Link:'))
+    link_lines = simpleSplit(fields['article_link'], 'Times-Roman', 11, PAGE_WIDTH - (LEFT + 1.25 * INCH))
+    operations.extend(('Times-Roman', 11, LEFT + 1.25 * INCH, link_y - i * 13, line) for i, line in enumerate(link_lines))
+    return operations
+
+
+def _pdf_string(text):
+    """A PDF literal string for ``text`` in the fonts' WinAnsi encoding"""
+    data = ' '.join(str(text).split()).encode('cp1252', 'replace')
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def text_stream(operations):
+    """PDF content stream that draws ``operations`` in black"""
+    parts = [b'q 0 g']
+    for font, size, x, y, text in operations:
+        parts.append(b'BT %s %d Tf %.2f %.2f Td %s Tj ET' % (FONTS[font].encode(), size, x, y, _pdf_string(text)))
+    parts.append(b'Q')
+    return b'\n'.join(parts)
+
+
+class CertificateRenderer:
+    """Fills the cert.pdf template with an article's fields.
+
+    The template is parsed once per process into a base page that already
+    carries the fonts and the text shared by every certificate. Each render
+    copies that page into a fresh writer and appends one small content
+    stream with the article's fields, so nothing is re-parsed or merged per
+    certificate. The base page is rebuilt when cert.pdf changes on disk.
+    """
+
+    def __init__(self, template_path=TEMPLATE_PATH):
+        self.template_path = template_path
+        self._lock = threading.Lock()
+        self._base_page = None
+        self._stamp = None
+
+    def _load(self, stamp):
+        from PyPDF2 import PdfReader, PdfWriter
+        from PyPDF2.generic import ArrayObject, DecodedStreamObject, DictionaryObject, NameObject
+
+        base = PdfWriter()
+        page = base.add_page(PdfReader(str(self.template_path)).pages[0])
+
+        resources = DictionaryObject(page['/Resources'].get_object())
+        fonts = DictionaryObject(resources.get('/Font', DictionaryObject()).get_object())
+        for font, name in FONTS.items():
+            fonts[NameObject(name)] = base._add_object(DictionaryObject({
+                NameObject('/Type'): NameObject('/Font'),
+                NameObject('/Subtype'): NameObject('/Type1'),
+                NameObject('/BaseFont'): NameObject(f'/{font}'),
+                NameObject('/Encoding'): NameObject('/WinAnsiEncoding'),
+            }))
+        resources[NameObject('/Font')] = fonts
+        page[NameObject('/Resources')] = resources
+
+        def stream(data):
+            content = DecodedStreamObject()
+            content.set_data(data)
+            return base._add_object(content)
+
+        # Isolate the template's graphics state, then draw the shared labels on top
+        contents = page['/Contents'].get_object()
+        original = list(contents) if isinstance(contents, ArrayObject) else [page['/Contents']]
+        page[NameObject('/Contents')] = ArrayObject([stream(b'q'), *original, stream(b'Q'), stream(text_stream(LABELS))])
+
+        self._base_page = page
+        self._stamp = stamp
+
+    def base_page(self):
+        """The prepared template page, or None when cert.pdf is missing"""
+        stamp = _template_stamp(self.template_path)
+        if not stamp:
+            return None
+        with self._lock:
+            if stamp != self._stamp:
+                self._load(stamp)
+            return self._base_page
+
+    def render(self, fields):
+        """PDF bytes of the certificate for ``fields``"""
+        from PyPDF2 import PdfWriter
+        from PyPDF2.generic import DecodedStreamObject, NameObject
+
+        base_page = self.base_page()
+        if base_page is None:
+            return render_fallback(fields)
+
+        operations = layout(fields)[len(LABELS):]
+        writer = PdfWriter()
+        with self._lock:
+            page = writer.add_page(base_page)
+        content = DecodedStreamObject()
+        content.set_data(text_stream(operations))
+        page[NameObject('/Contents')].append(writer._add_object(content))
+
+        output = BytesIO()
+        writer.write(output)
+        return output.getvalue()
+
+
+def render_fallback(fields):
+    """Plain certificate drawn from scratch, for when cert.pdf is missing"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.lib.utils import simpleSplit
+    from reportlab.pdfgen import canvas
+
+    output_buffer = BytesIO()
+    p = canvas.Canvas(output_buffer, pagesize=letter)
+    width, height = letter
+
+    # Draw basic certificate structure
+    p.setFont("Helvetica-Bold", 20)
+    p.drawCentredString(width/2, height - 1.5 * inch, "ARTICLE INDEXING CERTIFICATE")
+
+    # Add article data
+    p.setFont("Helvetica", 11)
+    p.drawString(1.5 * inch, height - 3 * inch, f"Authors: {fields['authors_names']}")
+    p.drawString(1.5 * inch, height - 3.25 * inch, f"Article Number: {fields['article_number']}")
+    p.drawString(1.5 * inch, height - 3.5 * inch, f"Volume: {fields['volume']}, Issue: {fields['issue']}, Pages: {fields['pages']}")
+    p.drawString(1.5 * inch, height - 4 * inch, f"Date of Indexing: {fields['date_of_indexing']}")
+    p.drawString(1.5 * inch, height - 4.25 * inch, f"Article Link: {fields['article_link']}")
+
+    # Article title acknowledgment
+    ack_text = ACKNOWLEDGEMENT.format(title=fields['article_title'])
+    wrapped_ack = simpleSplit(ack_text, "Helvetica", 11, width - 3*inch)
+    for i, line in enumerate(wrapped_ack):
+        p.drawString(1.5 * inch, height - 4.5 * inch - (i * 15), line)
+
+    p.showPage()
+    p.save()
+    return output_buffer.getvalue()
+
+
+renderer = CertificateRenderer()
+
+
+def render_certificate(fields):
+    """Draw ``fields`` over the cert.pdf template and return the PDF bytes"""
+    return renderer.render(fields)
+
+
+def _template_stamp(path=TEMPLATE_PATH):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def certificate_path(article_id, fields):
+    """Where the certificate for these printed ``fields`` is stored.
+
+    The file name is a hash of the fields and the template's mtime, so any
+    change to what would be printed (or to cert.pdf) maps to a new file.
+    """
+    payload = json.dumps([fields, _template_stamp()], sort_keys=True)
+    digest = hashlib.sha256(payload.encode()).hexdigest()
+    return Path(settings.CERTIFICATE_CACHE_ROOT) / str(article_id) / f'{digest}.pdf'
+
+
+def _store(path, data):
+    """Write ``data`` to ``path`` atomically, so readers never see a partial file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def open_certificate(article_id, fields):
+    """A readable file holding the certificate PDF, rendered and stored only on the first request"""
+    path = certificate_path(article_id, fields)
+    try:
+        return open(path, 'rb')
+    except FileNotFoundError:
+        pass
+    data = render_certificate(fields)
+    _store_if_possible(path, data)
+    return BytesIO(data)
+
+
+def _store_if_possible(path, data):
+    try:
+        _store(path, data)
+    except OSError:
+        # Purged while writing, or the cache directory is unwritable: serve it uncached
+        pass
+
+
+def invalidate(article_id):
+    """Delete every stored certificate of an article"""
+    shutil.rmtree(Path(settings.CERTIFICATE_CACHE_ROOT) / str(article_id), ignore_errors=True)
+
+
+BULK_FILTERS = ('journal_name', 'volume', 'issue', 'year')
+
+
+def filtered_articles(journal_name=None, volume=None, issue=None, year=None):
+    """Indexed articles matching every given filter, with their authors, in id order"""
+    from app.models import Article
+
+    articles = Article.objects.filter(status__in=['approved', 'pending'])
+    if journal_name:
+        articles = articles.filter(journal_name=journal_name)
+    if volume:
+        articles = articles.filter(volume=volume)
+    if issue:
+        articles = articles.filter(issue=issue)
+    if year:
+        articles = articles.filter(year_of_publication=int(year))
+    return articles.prefetch_related('authors').order_by('id')
+
+
+def _result(name, path, fields, future):
+    if future is not None:
+        data = future.result()
+        _store_if_possible(path, data)
+        return name, data
+    try:
+        return name, path.read_bytes()
+    except FileNotFoundError:
+        # Purged since we looked; render it here
+        return name, render_certificate(fields)
+
+
+def bulk_certificates(articles, base_url, workers=None):
+    """Yield ``(filename, pdf bytes)`` for each article, in order.
+
+    Stored certificates are read from disk; the rest are rendered across a
+    process pool (each worker parses cert.pdf once) and stored for next
+    time. Only a few certificates per worker are in flight at once, so
+    memory stays flat however many articles match.
+    """
+    workers = workers or os.cpu_count() or 1
+    # forkserver children start from a clean process, which is safe from a threaded web server
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context('forkserver'))
+    pending = deque()
+    try:
+        for article in articles.iterator(chunk_size=200):
+            fields = article_fields(article, f'{base_url}/indexed_articles/view/{article.id}/')
+            path = certificate_path(article.id, fields)
+            future = None if path.exists() else pool.submit(render_certificate, fields)
+            pending.append((f'article_certificate_{article.id}.pdf', path, fields, future))
+            while len(pending) > workers * 2:
+                yield _result(*pending.popleft())
+        while pending:
+            yield _result(*pending.popleft())
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+class _ChunkBuffer:
+    """Write-only file object that hands back whatever was written since the last drain"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def zip_stream(files):
+    """Yield a ZIP archive of ``(filename, data)`` pairs chunk by chunk, one file in memory at a time.
+
+    PDFs barely compress, so entries are stored rather than deflated.
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        for name, data in files:
+            archive.writestr(name, data)
+            yield buffer.drain()
+    yield buffer.drain()
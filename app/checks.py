@@ -0,0 +1,23 @@
+"""System checks for deployment settings the app relies on"""
+from django.conf import settings
+from django.core.checks import Warning, register
+
+# Backends whose entries are only visible to the process that wrote them
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """Settings versions and page/fragment purges only reach other workers through a shared cache"""
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend in PROCESS_LOCAL_CACHES:
+        return [Warning(
+            f'The default cache ({backend}) is local to each process.',
+            hint='Settings changes and cache purges will not reach other workers; '
+                 'configure a shared backend (file, Redis, Memcached or database cache).',
+            id='app.W001',
+        )]
+    return []
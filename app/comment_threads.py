@@ -0,0 +1,45 @@
+"""Pages of news comments with their counts, authors and the viewer's reactions loaded up front"""
+from collections import namedtuple
+
+from django.db.models import BooleanField, Count, Exists, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from app.models import NewsComment
+from app.pagination import keyset_paginate
+
+COMMENTS_PER_PAGE = 20
+COMMENT_ORDERING = ('-created_at', '-id')
+
+CommentThread = namedtuple('CommentThread', ['comments', 'total', 'next_cursor'])
+
+
+def _viewer_reaction(reaction, user):
+    if not user.is_authenticated:
+        return Value(False, output_field=BooleanField())
+    through = getattr(NewsComment, reaction).through
+    return Exists(through.objects.filter(newscomment_id=OuterRef('pk'), user_id=user.pk))
+
+
+def with_thread_data(queryset, user):
+    """Annotate ``replies_count``, ``user_liked`` and ``user_disliked`` and join the author.
+
+    Like/dislike totals are the denormalized ``likes_count``/``dislikes_count``
+    columns, so a page of comments is a single query whatever its size.
+    """
+    replies = (
+        NewsComment.objects.filter(parent=OuterRef('pk'), is_approved=True)
+        .order_by().values('parent').annotate(total=Count('*')).values('total')
+    )
+    return queryset.select_related('user').annotate(
+        replies_count=Coalesce(Subquery(replies, output_field=IntegerField()), 0),
+        user_liked=_viewer_reaction('likes', user),
+        user_disliked=_viewer_reaction('dislikes', user),
+    )
+
+
+def load_thread(article, user, cursor=None, limit=COMMENTS_PER_PAGE):
+    """One ``CommentThread`` page of ``article``'s approved top-level comments, newest first, in two queries"""
+    comments = NewsComment.objects.filter(article=article, parent=None, is_approved=True)
+    total = comments.count()
+    page = keyset_paginate(with_thread_data(comments, user), COMMENT_ORDERING, limit, cursor)
+    return CommentThread(page.items, total, page.next_cursor)
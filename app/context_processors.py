@@ -1,12 +1,21 @@
+from django.utils.functional import SimpleLazyObject
+
+from app import page_cache
 from app.models import SiteSettings
 
 def site_settings(request):
-    """Make site settings available in all templates"""
-    try:
-        settings = SiteSettings.get_settings()
-    except:
-        settings = None
+    """Make site settings available in all templates, loaded only if a template uses them"""
+    def load():
+        try:
+            return SiteSettings.for_request(request)
+        except:
+            return None
     return {
-        'site_settings': settings
+        'site_settings': SimpleLazyObject(load)
     }
 
+def fragment_cache(request):
+    """Lifetime of the {% cache %} fragments: a day with a shared cache, briefly if purges can't reach other workers"""
+    return {
+        'fragment_cache_timeout': page_cache.page_timeout()
+    }
@@ -1,5 +1,7 @@
 from functools import wraps
 from django.http import HttpResponseNotFound
+from django.utils.cache import get_conditional_response
+from app import page_cache
 from app.models import SiteSettings
 
 def check_page_enabled(page_setting_name):
@@ -7,10 +9,63 @@ def check_page_enabled(page_setting_name):
     def decorator(view_func):
         @wraps(view_func)
         def wrapper(request, *args, **kwargs):
-            site_settings = SiteSettings.get_settings()
-            if not getattr(site_settings, page_setting_name, True):
+            # A set lookup in the compiled snapshot of disabled pages, no settings row needed
+            if page_setting_name in SiteSettings.disabled_pages():
                 return HttpResponseNotFound("Page not found")
             return view_func(request, *args, **kwargs)
         return wrapper
     return decorator
 
+def prerendered(view_func):
+    """Serve anonymous visitors the stored HTML of a page that only depends on SiteSettings and templates.
+
+    The page is rendered once per settings version and template fingerprint,
+    then served from the cache with ETag/Last-Modified (and 304s).
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not page_cache.is_cacheable_request(request):
+            return view_func(request, *args, **kwargs)
+        key = page_cache.page_key(request, 'prerendered', SiteSettings.cache_version(), page_cache.templates_version())
+        return page_cache.cached_page(request, key, lambda: view_func(request, *args, **kwargs))
+    return wrapper
+
+def cache_for_anonymous(*models, on_hit=None):
+    """Let ``AnonymousPageCacheMiddleware`` serve this view's page to anonymous visitors.
+
+    ``models`` are every model the page shows rows of; saving or deleting any
+    of them purges the cached copies. ``on_hit`` is called with the view's
+    arguments when a cached copy is served, for side effects such as counting views.
+    """
+    def decorator(view_func):
+        view_func.page_cache_models = models
+        view_func.page_cache_on_hit = on_hit
+        return view_func
+    return decorator
+
+def conditional_page(get_etag, on_not_modified=None):
+    """Answer If-None-Match with a 304 before the view does any work.
+
+    ``get_etag`` is called with the view's arguments and returns the page's
+    ETag from a cheap query, or None to always run the view (missing object,
+    visitor-specific page). ``on_not_modified`` is called with the same
+    arguments when a 304 is sent, for side effects such as counting views.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            etag = None
+            if request.method in ('GET', 'HEAD'):
+                etag = get_etag(request, *args, **kwargs)
+            if etag is None:
+                return view_func(request, *args, **kwargs)
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+            elif on_not_modified is not None:
+                on_not_modified(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response.headers.setdefault('ETag', etag)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from app.search import cache as autocomplete_cache
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss counters of the hero autocomplete response cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing them')
+
+    def handle(self, *args, **options):
+        stats = autocomplete_cache.stats()
+        self.stdout.write(f"hits: {stats['hits']}")
+        self.stdout.write(f"misses: {stats['misses']}")
+        self.stdout.write(f"hit rate: {stats['hit_rate']:.1%}")
+        if options['reset']:
+            autocomplete_cache.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app.models import DirectoryApplication, ResearchArea
+
+
+class Command(BaseCommand):
+    help = 'Parse research_areas of every directory application into research area tags'
+
+    def handle(self, *args, **options):
+        count = 0
+        with transaction.atomic():
+            for application in DirectoryApplication.objects.only('id', 'research_areas').iterator(chunk_size=500):
+                application.sync_research_areas()
+                count += 1
+        self.stdout.write(f'{count} directory application(s) processed')
+        self.stdout.write(self.style.SUCCESS(f'{ResearchArea.objects.count()} research area(s) in use'))
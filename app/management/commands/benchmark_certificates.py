@@ -0,0 +1,64 @@
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+
+from app import certificates
+
+SAMPLE_FIELDS = {
+    'authors_names': 'Dr. Sarah Johnson, Dr. Michael Chen, Dr. Emily Rodriguez',
+    'article_number': 'SIS000001AI141125',
+    'recorded_by': certificates.RECORDED_BY,
+    'volume': '10',
+    'issue': '4',
+    'pages': '123-130',
+    'date_of_indexing': 'November 14 2025',
+    'article_link': 'https://www.scholarindexing.com/indexed_articles/view/1/',
+    'article_title': 'Blood-Pressure Targets in Comatose Survivors of Cardiac Arrest',
+}
+
+
+def legacy_render(fields):
+    """The certificate as it was rendered before CertificateRenderer: overlay canvas, re-read template, merge"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    from PyPDF2 import PdfReader, PdfWriter
+
+    overlay_buffer = BytesIO()
+    overlay_canvas = canvas.Canvas(overlay_buffer, pagesize=letter)
+    for font, size, x, y, text in certificates.layout(fields):
+        overlay_canvas.setFont(font, size)
+        overlay_canvas.drawString(x, y, text)
+    overlay_canvas.save()
+
+    with open(certificates.TEMPLATE_PATH, 'rb') as template_file:
+        template_page = PdfReader(template_file).pages[0]
+        overlay_buffer.seek(0)
+        template_page.merge_page(PdfReader(overlay_buffer).pages[0])
+        writer = PdfWriter()
+        writer.add_page(template_page)
+        output = BytesIO()
+        writer.write(output)
+        return output.getvalue()
+
+
+class Command(BaseCommand):
+    help = 'Measure certificates rendered per second, before and after CertificateRenderer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        certificates.render_certificate(SAMPLE_FIELDS)  # parse the template once, as a running worker would have
+
+        for label, render in (('legacy', legacy_render), ('renderer', certificates.render_certificate)):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                render(SAMPLE_FIELDS)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{label:>8}: {elapsed / iterations * 1e3:7.2f} ms/certificate, '
+                f'{iterations / elapsed:7.1f} certificates/s'
+            )
+        self.stdout.write(self.style.SUCCESS(f'{iterations} certificates per variant'))
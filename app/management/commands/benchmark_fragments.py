@@ -0,0 +1,50 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from app import page_cache
+from app.models import SiteSettings
+from app.views import landing, news
+
+PAGES = (
+    ('landing', '/', landing, page_cache.LANDING_FRAGMENTS),
+    ('news', '/news/', news, page_cache.NEWS_FRAGMENTS),
+)
+
+
+class Command(BaseCommand):
+    help = 'Measure landing and news render time with cold and warm template fragment caches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        factory = RequestFactory()
+        SiteSettings.get_cached()  # warm the process-local copy
+
+        with override_settings(DEBUG=True):
+            for name, path, view, fragments in PAGES:
+                request = factory.get(path)
+                request.user = AnonymousUser()
+                # Views are called directly, so the anonymous page cache never answers
+                for label, purge in (('cold', True), ('warm', False)):
+                    view(request)
+                    reset_queries()
+                    elapsed = 0
+                    for _ in range(iterations):
+                        if purge:
+                            page_cache.purge_fragments(fragments)
+                        start = time.perf_counter()
+                        view(request)
+                        elapsed += time.perf_counter() - start
+                    queries = len(connection.queries)
+                    self.stdout.write(
+                        f'{name:>8} {label}: {elapsed / iterations * 1e3:8.2f} ms/render, '
+                        f'{queries / iterations:.1f} queries/render'
+                    )
+        self.stdout.write(self.style.SUCCESS(f'{iterations} renders per variant'))
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries
+from django.http import HttpResponse, HttpResponseNotFound
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from app.decorators import check_page_enabled
+from app.models import SiteSettings
+
+
+def legacy_check_page_enabled(page_setting_name):
+    """check_page_enabled as it was before the compiled snapshot: read the row, getattr the flag"""
+    def decorator(view_func):
+        def wrapper(request, *args, **kwargs):
+            site_settings = SiteSettings.get_settings()
+            if not getattr(site_settings, page_setting_name, True):
+                return HttpResponseNotFound("Page not found")
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def view(request):
+    return HttpResponse('ok')
+
+
+class Command(BaseCommand):
+    help = 'Measure the per-request overhead of check_page_enabled, before and after the compiled page-flag snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=5000)
+        parser.add_argument('--page', default='enable_indexed_articles_page', help='enable_* flag to check')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        request = RequestFactory().get('/')
+        SiteSettings.get_cached()  # warm the process-local copy
+
+        with override_settings(DEBUG=True):
+            for label, decorator in (('legacy', legacy_check_page_enabled), ('compiled', check_page_enabled)):
+                wrapped = decorator(options['page'])(view)
+                reset_queries()
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    wrapped(request)
+                elapsed = time.perf_counter() - start
+                queries = len(connection.queries)
+                self.stdout.write(
+                    f'{label:>8}: {elapsed / iterations * 1e6:8.1f} us/request, '
+                    f'{queries / iterations:.1f} queries/request'
+                )
+        self.stdout.write(self.style.SUCCESS(f'{iterations} iterations per variant'))
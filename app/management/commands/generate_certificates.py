@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app import certificates
+
+
+class Command(BaseCommand):
+    help = 'Write a ZIP with the certificate of every indexed article matching a journal/volume/issue/year filter'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--journal-name')
+        parser.add_argument('--volume')
+        parser.add_argument('--issue')
+        parser.add_argument('--year', type=int)
+        parser.add_argument('--all', action='store_true', help='Include every indexed article when no filter is given')
+        parser.add_argument('--base-url', default='https://www.scholarindexing.com', help='Prefix of the article links printed on certificates')
+        parser.add_argument('--workers', type=int, help='Render processes (default: one per CPU)')
+        parser.add_argument('--output', default='article_certificates.zip')
+
+    def handle(self, *args, **options):
+        filters = {name: options[name] for name in certificates.BULK_FILTERS if options[name]}
+        if not filters and not options['all']:
+            raise CommandError('Give at least one of --journal-name, --volume, --issue or --year, or pass --all')
+
+        articles = certificates.filtered_articles(**filters)
+        count = 0
+
+        def counted(files):
+            nonlocal count
+            for name, data in files:
+                count += 1
+                yield name, data
+
+        files = certificates.bulk_certificates(articles, options['base_url'].rstrip('/'), workers=options['workers'])
+        with open(options['output'], 'wb') as output:
+            for chunk in certificates.zip_stream(counted(files)):
+                output.write(chunk)
+        self.stdout.write(self.style.SUCCESS(f"{count} certificates written to {options['output']}"))
@@ -0,0 +1,99 @@
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management.base import BaseCommand
+from django.template import Node, RequestContext, Template, engines
+from django.test import RequestFactory
+
+from app.models import Article, Journal, Project, NewsArticle, NewsTag, SiteSettings
+
+TEMPLATE_DIR = Path(__file__).resolve().parents[2] / 'templates' / 'app'
+
+
+def count_nodes(nodelist):
+    """Number of nodes in a compiled template, including those nested in blocks, loops and ifs"""
+    return len(nodelist.get_nodes_by_type(Node))
+
+
+def sample_context():
+    """One real row of each content model, under the names the views use, plus their lists"""
+    article = Article.objects.first()
+    journal = Journal.objects.first()
+    project = Project.objects.first()
+    news = NewsArticle.objects.filter(is_published=True).first()
+    return {
+        'article': article or news,
+        'journal': journal,
+        'project': project,
+        'articles': list(Article.objects.all()[:10]),
+        'journals': list(Journal.objects.all()[:10]),
+        'projects': list(Project.objects.all()[:10]),
+        'latest_articles': list(Article.objects.filter(status='approved')[:6]),
+        'latest_news': list(NewsArticle.objects.filter(is_published=True)[:10]),
+        'recommended_news': list(NewsArticle.objects.filter(is_published=True)[:9]),
+        'top_tags': list(NewsTag.objects.filter(is_active=True)[:3]),
+        'blog': news,
+        'view_user': User.objects.first(),
+        'site_settings': SiteSettings.get_cached(),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Compile and render every template in app/templates/app and report compile time, render time and node count'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=5, help='Compiles and renders per template (best is kept)')
+        parser.add_argument('--sort', choices=['compile', 'render', 'nodes', 'name'], default='render')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        engine = engines['django'].engine
+        host = next((host for host in settings.ALLOWED_HOSTS if '*' not in host), 'localhost').lstrip('.')
+        request = RequestFactory(HTTP_HOST=host).get('/')
+        request.user = AnonymousUser()
+        context = sample_context()
+
+        rows = []
+        for path in sorted(TEMPLATE_DIR.glob('*.html')):
+            name = f'app/{path.name}'
+            source = path.read_text(encoding='utf-8')
+            compile_time = render_time = template = None
+            error = ''
+            try:
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    template = Template(source, name=name, engine=engine)
+                    elapsed = time.perf_counter() - start
+                    compile_time = elapsed if compile_time is None else min(compile_time, elapsed)
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    template.render(RequestContext(request, context))
+                    elapsed = time.perf_counter() - start
+                    render_time = elapsed if render_time is None else min(render_time, elapsed)
+            except Exception as exc:
+                error = f'{type(exc).__name__}: {exc}'
+            rows.append({
+                'name': name,
+                'size': len(source),
+                'compile': compile_time,
+                'render': render_time,
+                'nodes': count_nodes(template.nodelist) if template is not None else 0,
+                'error': error,
+            })
+
+        sort = options['sort']
+        if sort == 'name':
+            rows.sort(key=lambda row: row['name'])
+        else:
+            rows.sort(key=lambda row: row[sort] or 0, reverse=True)
+
+        self.stdout.write(f"{'template':<45} {'KB':>7} {'compile ms':>11} {'render ms':>10} {'nodes':>6}")
+        for row in rows:
+            compile = f"{row['compile'] * 1e3:11.2f}" if row['compile'] is not None else f"{'error':>11}"
+            render = f"{row['render'] * 1e3:10.2f}" if row['render'] is not None else f"{'error':>10}"
+            self.stdout.write(f"{row['name']:<45} {row['size'] / 1024:7.1f} {compile} {render} {row['nodes']:6d}")
+            if row['error']:
+                self.stdout.write(self.style.WARNING(f"    {row['error'][:120]}"))
+        self.stdout.write(self.style.SUCCESS(f'{len(rows)} templates profiled, best of {iterations}'))
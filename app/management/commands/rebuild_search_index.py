@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from app.search import fts
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the SQLite FTS5 search index used by the hero autocomplete'
+
+    def handle(self, *args, **options):
+        if not fts.is_available():
+            self.stdout.write(self.style.ERROR('Full-text search index requires an SQLite database'))
+            return
+        counts = fts.rebuild()
+        for kind, count in counts.items():
+            self.stdout.write(f'{kind}: {count} indexed')
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt successfully'))
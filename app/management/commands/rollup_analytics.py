@@ -0,0 +1,43 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app import analytics
+from app.models import NewsArticle, Project
+from app.view_counts import view_counts
+
+
+class Command(BaseCommand):
+    help = 'Aggregate the analytics event log into per-object daily totals and prune rolled-up events'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Recompute from this day (YYYY-MM-DD) instead of the last rolled-up day; '
+                                            'days whose events may be pruned are skipped')
+        parser.add_argument('--keep-days', type=int, default=analytics.KEEP_DAYS,
+                            help='Raw events kept after they are rolled up (keep it the same between runs)')
+        parser.add_argument('--top', action='store_true', help="Print this week's most viewed projects and news")
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since must be a date like 2025-01-31')
+            oldest = analytics.first_complete_day(options['keep_days'])
+            if since < oldest:
+                self.stdout.write(self.style.WARNING(
+                    f'Events before {oldest} may already be pruned; recomputing from {oldest} instead'))
+
+        view_counts.flush()
+        written = analytics.rollup(since, options['keep_days'])
+        pruned = analytics.prune_events(options['keep_days'])
+        self.stdout.write(self.style.SUCCESS(f'{written} daily totals written, {pruned} old events pruned'))
+
+        if options['top']:
+            for label, model, event in (('Projects (views)', Project, 'view'),
+                                        ('Projects (downloads)', Project, 'download'),
+                                        ('News (views)', NewsArticle, 'view')):
+                self.stdout.write(f'{label}, last 7 days:')
+                for obj, total in analytics.top_objects(model, event):
+                    self.stdout.write(f'{total:8d}  {obj}')
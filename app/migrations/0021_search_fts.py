@@ -0,0 +1,26 @@
+from django.db import migrations
+
+from app.search import fts
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    fts.rebuild(get_model=apps.get_model)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(fts.DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0020_newsbookmark'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
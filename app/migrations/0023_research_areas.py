@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0022_project_archive_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResearchArea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('key', models.CharField(help_text='Lowercased name used for matching', max_length=200, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Research Area',
+                'verbose_name_plural': 'Research Areas',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='directoryapplication',
+            name='areas',
+            field=models.ManyToManyField(blank=True, related_name='researchers', to='app.researcharea'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def repair_superuser_staff_flags(apps, schema_editor):
+    """Superusers must also be staff; list_accounts used to patch this on every page view"""
+    User = apps.get_model('auth', 'User')
+    User.objects.filter(is_superuser=True, is_staff=False).update(is_staff=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0023_research_areas'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(repair_superuser_staff_flags, migrations.RunPython.noop),
+        # Expression indexes for the case-insensitive prefix search in list_accounts
+        migrations.RunSQL(
+            'CREATE INDEX app_auth_user_lower_username ON auth_user (LOWER(username))',
+            'DROP INDEX app_auth_user_lower_username',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX app_auth_user_lower_email ON auth_user (LOWER(email))',
+            'DROP INDEX app_auth_user_lower_email',
+        ),
+    ]
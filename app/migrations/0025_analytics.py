@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0024_account_flags_and_lower_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.CharField(help_text="Model name, e.g. 'project' or 'newsarticle'", max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('event', models.CharField(choices=[('view', 'View'), ('download', 'Download')], max_length=20)),
+                ('count', models.PositiveIntegerField(default=1, help_text='Events of this kind buffered into one row')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Analytics Event',
+                'verbose_name_plural': 'Analytics Events',
+            },
+        ),
+        migrations.CreateModel(
+            name='AnalyticsDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.CharField(max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('event', models.CharField(choices=[('view', 'View'), ('download', 'Download')], max_length=20)),
+                ('day', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Analytics Daily Total',
+                'verbose_name_plural': 'Analytics Daily Totals',
+                'indexes': [models.Index(fields=['object_type', 'event', 'day'], name='app_analyti_object__ad1029_idx')],
+                'constraints': [models.UniqueConstraint(fields=('object_type', 'object_id', 'event', 'day'), name='analytics_daily_unique')],
+            },
+        ),
+    ]
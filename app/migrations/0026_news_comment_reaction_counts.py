@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:05
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_reaction_counts(apps, schema_editor):
+    """Count the existing likes/dislikes into the new columns"""
+    NewsComment = apps.get_model('app', 'NewsComment')
+
+    def reaction_count(field):
+        through = NewsComment._meta.get_field(field).remote_field.through
+        return Coalesce(Subquery(
+            through.objects.filter(newscomment_id=OuterRef('pk')).order_by().values('newscomment_id')
+            .annotate(total=Count('*')).values('total'),
+            output_field=models.IntegerField(),
+        ), 0)
+
+    NewsComment.objects.update(likes_count=reaction_count('likes'), dislikes_count=reaction_count('dislikes'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0025_analytics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newscomment',
+            name='dislikes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='newscomment',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_reaction_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+from app.search import fts
+
+
+def reindex_search_text(apps, schema_editor):
+    """Rebuild the index so existing rows lose the HTML entities it used to store"""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    fts.rebuild(get_model=apps.get_model)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0026_news_comment_reaction_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(reindex_search_text, migrations.RunPython.noop),
+    ]
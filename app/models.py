@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.core.validators import FileExtensionValidator
 
@@ -174,6 +175,16 @@ class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Archive facet filters, each followed by the default "recent" ordering
+            models.Index(fields=['category', '-created_at', '-id']),
+            models.Index(fields=['institution', '-created_at', '-id']),
+            models.Index(fields=['status', '-created_at', '-id']),
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['project_title', 'id']),
+        ]
+
     def __str__(self):
         return self.project_title
 
@@ -251,6 +262,46 @@ class MembershipRequest(models.Model):
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.membership_type}"
 
+# Research Area Model - normalized tags parsed from DirectoryApplication.research_areas
+class ResearchArea(models.Model):
+    name = models.CharField(max_length=200)
+    key = models.CharField(max_length=200, unique=True, help_text="Lowercased name used for matching")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'Research Area'
+        verbose_name_plural = 'Research Areas'
+
+    def __str__(self):
+        return self.name
+
+    @staticmethod
+    def split(text):
+        """Split free-text research areas on commas, semicolons and new lines"""
+        import re
+        names = []
+        seen = set()
+        for part in re.split(r'[,;\n|]+', text or ''):
+            name = ' '.join(part.split()).strip(' .')[:200]
+            if name and name.lower() not in seen:
+                seen.add(name.lower())
+                names.append(name)
+        return names
+
+    @classmethod
+    def for_text(cls, text):
+        """Get or create the areas named in ``text``"""
+        names = cls.split(text)
+        existing = {area.key: area for area in cls.objects.filter(key__in=[name.lower() for name in names])}
+        areas = []
+        for name in names:
+            area = existing.get(name.lower())
+            if area is None:
+                area, _ = cls.objects.get_or_create(key=name.lower(), defaults={'name': name})
+            areas.append(area)
+        return areas
+
 # Directory Application Model
 class DirectoryApplication(models.Model):
     first_name = models.CharField(max_length=100)
@@ -261,6 +312,7 @@ class DirectoryApplication(models.Model):
     institution = models.CharField(max_length=300)
     position = models.CharField(max_length=200)
     research_areas = models.TextField()
+    areas = models.ManyToManyField(ResearchArea, blank=True, related_name='researchers')
     education_background = models.TextField(blank=True)
     publications_summary = models.TextField(blank=True)
     profile_photo = models.ImageField(upload_to='directory_applications/photos/', blank=True, null=True)
@@ -278,6 +330,10 @@ class DirectoryApplication(models.Model):
     def __str__(self):
         return f"{self.first_name} {self.last_name} - Directory Application"
 
+    def sync_research_areas(self):
+        """Point ``areas`` at the tags parsed from the research_areas text"""
+        self.areas.set(ResearchArea.for_text(self.research_areas))
+
 # Hall of Fame Application Model
 class HallOfFameApplication(models.Model):
     APPLICATION_TYPE_CHOICES = [
@@ -912,11 +968,84 @@ class SiteSettings(models.Model):
     def __str__(self):
         return "Site Settings"
     
+    # Shared-cache key holding the current settings version; every process keeps
+    # its own copy of the row and reloads it when this value changes
+    CACHE_VERSION_KEY = 'site_settings:version'
+    _cached = (None, None)
+    _disabled_pages = (None, frozenset())
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from django.db import transaction
+        transaction.on_commit(SiteSettings.bump_cache_version)
+    
     @classmethod
     def get_settings(cls):
         """Get or create the site settings singleton"""
         settings, created = cls.objects.get_or_create(pk=1)
         return settings
+    
+    @classmethod
+    def get_cached(cls):
+        """Site settings for reading, shared by the process until they are saved again.
+        
+        Costs one cache lookup instead of a query. Don't modify the returned
+        object; use get_settings() to edit and save.
+        """
+        return cls._versioned_settings()[1]
+    
+    @classmethod
+    def _versioned_settings(cls):
+        """``(version, settings)`` for get_cached(), always taken from the same load"""
+        version = cls.cache_version()
+        cached = cls._cached
+        if version == cached[0]:
+            return cached
+        cached = (version, cls.get_settings())
+        cls._cached = cached
+        return cached
+    
+    @classmethod
+    def disabled_pages(cls):
+        """Frozenset of the enable_* page flags that are switched off, rebuilt only when settings change"""
+        version, settings = cls._versioned_settings()
+        memo_version, pages = cls._disabled_pages
+        if memo_version != version:
+            pages = frozenset(
+                field.name for field in cls._meta.fields
+                if field.name.startswith('enable_') and not getattr(settings, field.name)
+            )
+            cls._disabled_pages = (version, pages)
+        return pages
+    
+    @classmethod
+    def for_request(cls, request):
+        """get_cached(), looked up at most once per request and kept on it"""
+        if not hasattr(request, '_site_settings'):
+            request._site_settings = cls.get_cached()
+        return request._site_settings
+    
+    @classmethod
+    def cache_version(cls):
+        """Token identifying the current saved state of the settings.
+
+        Kept in the default cache, which must be shared by every worker
+        (see CACHES in settings.py) for a save to reach all of them.
+        """
+        from django.core.cache import cache
+        version = cache.get(cls.CACHE_VERSION_KEY)
+        if version is None:
+            version = cls.bump_cache_version()
+        return version
+    
+    @classmethod
+    def bump_cache_version(cls):
+        """Make every process reload the settings on its next get_cached()"""
+        import uuid
+        from django.core.cache import cache
+        version = uuid.uuid4().hex
+        cache.set(cls.CACHE_VERSION_KEY, version, None)
+        return version
 
 # Blog Model
 class Blog(models.Model):
@@ -982,6 +1111,9 @@ class NewsComment(models.Model):
     content = models.TextField()
     likes = models.ManyToManyField(User, related_name='liked_news_comments', blank=True)
     dislikes = models.ManyToManyField(User, related_name='disliked_news_comments', blank=True)
+    # Denormalized sizes of likes/dislikes, kept in step by toggle_reaction and refresh_reaction_counts
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    dislikes_count = models.PositiveIntegerField(default=0, editable=False)
     is_approved = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -995,10 +1127,61 @@ class NewsComment(models.Model):
         return f"Comment by {self.user.username} on {self.article.title}"
     
     def get_likes_count(self):
-        return self.likes.count()
+        return self.likes_count
     
     def get_dislikes_count(self):
-        return self.dislikes.count()
+        return self.dislikes_count
+
+    def toggle_reaction(self, user, reaction):
+        """Toggle ``user``'s 'likes' or 'dislikes' reaction, clearing the opposite one; returns whether it is now set.
+
+        The comment row is locked and both memberships are read with one
+        EXISTS query, and the counters move by the same deltas as the M2M
+        rows in the same transaction, so the cost doesn't grow with the
+        number of reactions.
+        """
+        opposite = 'dislikes' if reaction == 'likes' else 'likes'
+        with transaction.atomic():
+            state = NewsComment.objects.select_for_update().filter(pk=self.pk).annotate(
+                has=models.Exists(self._reactions(reaction).filter(user_id=user.pk)),
+                has_opposite=models.Exists(self._reactions(opposite).filter(user_id=user.pk)),
+            ).values('has', 'has_opposite').get()
+
+            deltas = {}
+            if state['has']:
+                getattr(self, reaction).remove(user)
+                deltas[f'{reaction}_count'] = models.F(f'{reaction}_count') - 1
+            else:
+                getattr(self, reaction).add(user)
+                deltas[f'{reaction}_count'] = models.F(f'{reaction}_count') + 1
+                if state['has_opposite']:
+                    getattr(self, opposite).remove(user)
+                    deltas[f'{opposite}_count'] = models.F(f'{opposite}_count') - 1
+            NewsComment.objects.filter(pk=self.pk).update(**deltas)
+            self.likes_count, self.dislikes_count = NewsComment.objects.filter(pk=self.pk).values_list(
+                'likes_count', 'dislikes_count').get()
+        return not state['has']
+
+    def refresh_reaction_counts(self):
+        """Recount likes/dislikes from the M2M tables, after edits that bypass toggle_reaction"""
+        NewsComment.objects.filter(pk=self.pk).update(
+            likes_count=self._reaction_count('likes'),
+            dislikes_count=self._reaction_count('dislikes'),
+        )
+        self.likes_count, self.dislikes_count = NewsComment.objects.filter(pk=self.pk).values_list(
+            'likes_count', 'dislikes_count').get()
+
+    @staticmethod
+    def _reactions(reaction):
+        return getattr(NewsComment, reaction).through.objects.filter(newscomment_id=models.OuterRef('pk'))
+
+    @classmethod
+    def _reaction_count(cls, reaction):
+        return Coalesce(models.Subquery(
+            cls._reactions(reaction).order_by().values('newscomment_id')
+            .annotate(total=models.Count('*')).values('total'),
+            output_field=models.IntegerField(),
+        ), 0)
     
     def get_replies_count(self):
         return self.replies.filter(is_approved=True).count()
@@ -1090,4 +1273,46 @@ class NewsArticle(models.Model):
         else:
             suffix = ["st", "nd", "rd"][day % 10 - 1]
         
-        return self.published_date.strftime(f"%d{suffix} %B, %Y")
\ No newline at end of file
+        return self.published_date.strftime(f"%d{suffix} %B, %Y")
+
+# Analytics Event Model - append-only log of counted views and downloads
+class AnalyticsEvent(models.Model):
+    EVENT_CHOICES = [
+        ('view', 'View'),
+        ('download', 'Download'),
+    ]
+
+    object_type = models.CharField(max_length=50, help_text="Model name, e.g. 'project' or 'newsarticle'")
+    object_id = models.BigIntegerField()
+    event = models.CharField(max_length=20, choices=EVENT_CHOICES)
+    count = models.PositiveIntegerField(default=1, help_text="Events of this kind buffered into one row")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'Analytics Event'
+        verbose_name_plural = 'Analytics Events'
+
+    def __str__(self):
+        return f"{self.object_type} {self.object_id} {self.event} x{self.count}"
+
+# Analytics Daily Model - per-object daily totals rolled up from AnalyticsEvent
+class AnalyticsDaily(models.Model):
+    object_type = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    event = models.CharField(max_length=20, choices=AnalyticsEvent.EVENT_CHOICES)
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Analytics Daily Total'
+        verbose_name_plural = 'Analytics Daily Totals'
+        constraints = [
+            models.UniqueConstraint(fields=['object_type', 'object_id', 'event', 'day'], name='analytics_daily_unique'),
+        ]
+        indexes = [
+            # Top-N over a date range for one kind of object and event
+            models.Index(fields=['object_type', 'event', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.object_type} {self.object_id} {self.event} on {self.day}: {self.count}"
@@ -0,0 +1,232 @@
+"""Whole-page response cache for anonymous visitors, served with ETag/Last-Modified.
+
+Purges bump generation counters in the default cache, so they only reach
+every worker when that cache is shared (see CACHES in settings.py).
+"""
+import hashlib
+import os
+import time
+from collections import namedtuple
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.http import http_date, quote_etag
+
+from app.checks import PROCESS_LOCAL_CACHES
+
+CachedPage = namedtuple('CachedPage', ['content', 'content_type', 'etag', 'last_modified'])
+
+PAGE_KEY = 'page_cache:{digest}'
+PAGE_TIMEOUT = 60 * 60 * 24
+# With a per-process cache, other workers miss purges; bound how long they serve stale pages and fragments
+LOCAL_PAGE_TIMEOUT = 60
+GENERATION_KEY = 'page_cache:generation:{label}'
+
+# Named {% cache %} fragments, purged by the save/delete signals of the models they show
+LANDING_FRAGMENTS = ('landing_latest_articles',)
+NEWS_FRAGMENTS = ('news_latest', 'news_recommended')
+
+# Tracking parameters never change what a page shows, so they don't split the cache
+IGNORED_PARAMS = frozenset(['fbclid', 'gclid', 'mc_cid', 'mc_eid'])
+
+_templates_version = None
+
+
+def cache_is_shared():
+    """Whether entries written by one worker are seen by the others"""
+    return settings.CACHES.get('default', {}).get('BACKEND') not in PROCESS_LOCAL_CACHES
+
+
+def page_timeout():
+    """Seconds a page or template fragment is stored: a day when purges reach every worker, a minute otherwise"""
+    return PAGE_TIMEOUT if cache_is_shared() else LOCAL_PAGE_TIMEOUT
+
+
+def templates_version():
+    """Fingerprint of the project's template files (newest mtime and file count).
+
+    Computed once per process, since templates only change on deploy; under
+    DEBUG it is recomputed on every call so edits show up immediately.
+    """
+    global _templates_version
+    if _templates_version is None or settings.DEBUG:
+        newest, count = 0, 0
+        for directory in _template_dirs():
+            for root, _, files in os.walk(directory):
+                for name in files:
+                    newest = max(newest, os.stat(os.path.join(root, name)).st_mtime_ns)
+                    count += 1
+        _templates_version = f'{newest}-{count}'
+    return _templates_version
+
+
+def _template_dirs():
+    """Every directory the configured loaders read: each engine's DIRS plus the apps' templates/ folders.
+
+    ``engine.template_dirs`` only includes the app folders when APP_DIRS is
+    set, which it can't be alongside explicit loaders.
+    """
+    from django.template import engines
+    from django.template.utils import get_app_template_dirs
+    dirs = [directory for engine in engines.all() for directory in engine.dirs]
+    dirs += get_app_template_dirs('templates')
+    return dict.fromkeys(str(directory) for directory in dirs)
+
+
+def purge_fragments(names):
+    """Drop the cached copies of the named template fragments"""
+    cache.delete_many([make_template_fragment_key(name) for name in names])
+
+
+def is_cacheable_request(request):
+    """Only anonymous GET/HEAD requests without a session or flash messages get shared pages"""
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if settings.SESSION_COOKIE_NAME in request.COOKIES:
+        return False
+    if request.user.is_authenticated:
+        return False
+    return len(get_messages(request)) == 0
+
+
+def normalized_path(request):
+    """The request path with its query string sorted and stripped of empty and tracking parameters"""
+    params = sorted(
+        (name, value)
+        for name, values in request.GET.lists()
+        if name not in IGNORED_PARAMS and not name.startswith('utm_')
+        for value in values if value
+    )
+    if not params:
+        return request.path
+    return f'{request.path}?{urlencode(params)}'
+
+
+def page_key(request, *parts):
+    """Cache key for the request's normalized path and query string plus any version ``parts``"""
+    raw = '|'.join([normalized_path(request), *[str(part) for part in parts]])
+    return PAGE_KEY.format(digest=hashlib.md5(raw.encode()).hexdigest())
+
+
+def _seed_generation(key):
+    """Start a missing or evicted counter at the current time.
+
+    Restarting at 1 would bring back pages still stored under an old
+    generation; a nanosecond clock value never repeats one.
+    """
+    cache.add(key, time.time_ns(), timeout=None)
+    return cache.get(key)
+
+
+def generations(models):
+    """Current page generation of each model, as a tuple in the given order"""
+    keys = [GENERATION_KEY.format(label=model._meta.label_lower) for model in models]
+    found = cache.get_many(keys)
+    return tuple(found[key] if key in found else _seed_generation(key) for key in keys)
+
+
+def bump_generation(model):
+    """Stop serving every cached page built from rows of ``model``"""
+    key = GENERATION_KEY.format(label=model._meta.label_lower)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        return _seed_generation(key)
+
+
+def page_etag(request, changed_at, *parts):
+    """Weak ETag for a page built from a row changed at ``changed_at`` and ``parts``.
+
+    ``parts`` should be cheap summaries of everything else the page shows
+    (related row counts, page generations). The visitor, settings and
+    template versions are always mixed in. No Last-Modified goes with it:
+    the row's timestamp doesn't move when only related rows change.
+    """
+    from app.models import SiteSettings
+    user = request.user.pk if request.user.is_authenticated else ''
+    raw = '|'.join(str(part) for part in (
+        changed_at.isoformat(), *parts, user, SiteSettings.cache_version(), templates_version(),
+    ))
+    return f'W/{quote_etag(hashlib.md5(raw.encode()).hexdigest())}'
+
+
+def is_storable_response(request, response):
+    """A full 200 page that carries nothing tied to this visitor (cookies, CSRF token, session writes)"""
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return False
+    if request.META.get('CSRF_COOKIE_NEEDS_UPDATE'):
+        return False
+    session = getattr(request, 'session', None)
+    return session is None or not session.modified
+
+
+def store(key, response):
+    """Keep a successful rendered HTML response under ``key`` and return its cached form"""
+    content = response.content
+    page = CachedPage(
+        content,
+        response.get('Content-Type', 'text/html; charset=utf-8'),
+        quote_etag(hashlib.md5(content).hexdigest()),
+        int(time.time()),
+    )
+    cache.set(key, page, page_timeout())
+    return page
+
+
+def respond(request, page):
+    """Serve a cached page, or a 304 if the client already holds this version"""
+    not_modified = get_conditional_response(request, etag=page.etag, last_modified=page.last_modified)
+    response = not_modified or HttpResponse(page.content, content_type=page.content_type)
+    response['ETag'] = page.etag
+    response['Last-Modified'] = http_date(page.last_modified)
+    # Logged-in visitors get a different page, so shared caches must key on the cookie
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def cached_page(request, key, render):
+    """Return the cached response for ``key``, rendering and storing it on a miss"""
+    page = cache.get(key)
+    if page is None:
+        response = render()
+        if not is_storable_response(request, response):
+            return response
+        page = store(key, response)
+    return respond(request, page)
+
+
+class AnonymousPageCacheMiddleware(MiddlewareMixin):
+    """Serve whole cached pages to anonymous visitors of views marked with ``cache_for_anonymous``.
+
+    Pages are keyed on the normalized path, the SiteSettings and template
+    versions and the page generation of every model the view reads, which the
+    save/delete signals bump, so a write purges exactly the pages built from
+    that model. Requests with a session, pending messages or a CSRF token in
+    the rendered page always go to the view.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        models = getattr(view_func, 'page_cache_models', None)
+        if models is None or not is_cacheable_request(request):
+            return None
+        from app.models import SiteSettings
+        key = page_key(request, 'anonymous', SiteSettings.cache_version(), templates_version(), generations(models))
+        page = cache.get(key)
+        if page is None:
+            request.page_cache_key = key
+            return None
+        if view_func.page_cache_on_hit is not None:
+            view_func.page_cache_on_hit(request, *view_args, **view_kwargs)
+        return respond(request, page)
+
+    def process_response(self, request, response):
+        key = getattr(request, 'page_cache_key', None)
+        if key is None or not is_storable_response(request, response):
+            return response
+        return respond(request, store(key, response))
@@ -0,0 +1,84 @@
+"""Keyset (cursor) pagination for querysets with a fixed, unique ordering"""
+import base64
+import json
+from collections import namedtuple
+from datetime import datetime
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+
+KeysetPage = namedtuple('KeysetPage', ['items', 'next_cursor'])
+
+DATETIME_TAG = '__datetime__'
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder, except datetimes keep their microseconds (it cuts them to milliseconds)"""
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return {DATETIME_TAG: o.isoformat()}
+        return super().default(o)
+
+
+def _decode_value(obj):
+    if set(obj) != {DATETIME_TAG}:
+        return obj
+    value = datetime.fromisoformat(obj[DATETIME_TAG])
+    if settings.USE_TZ and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def encode_cursor(values):
+    payload = json.dumps(values, cls=CursorEncoder)
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor, size):
+    """Return the list of ordering values in a cursor, or None if it is missing or malformed"""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()), object_hook=_decode_value)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return values
+
+
+def _after(ordering, values):
+    """Q for rows that sort strictly after ``values`` under ``ordering``"""
+    q = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        q |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return q
+
+
+def keyset_paginate(queryset, ordering, limit, cursor=None):
+    """Return one ``KeysetPage`` of ``queryset`` ordered by ``ordering``.
+
+    ``ordering`` is a sequence of field names (``-`` for descending) that must
+    end with a unique, non-null column such as ``-id``; every field must be
+    non-null. Instead of an OFFSET, the cursor holds the ordering values of
+    the last row shown, so deep pages cost the same as the first one.
+    """
+    ordering = list(ordering)
+    values = decode_cursor(cursor, len(ordering))
+    queryset = queryset.order_by(*ordering)
+    if values is not None:
+        queryset = queryset.filter(_after(ordering, values))
+    items = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, field.lstrip('-')) for field in ordering])
+    return KeysetPage(items, next_cursor)
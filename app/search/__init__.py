@@ -0,0 +1 @@
+from app.search.engine import search, SearchHit, SearchPage, CONTENT_KINDS  # noqa: F401
@@ -0,0 +1,89 @@
+"""Per-kind generation counters, and the hero autocomplete response cache keyed on them"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from app.search import fts
+
+GENERATION_KEY = 'search:generation:{kind}'
+RESPONSE_KEY = 'search:autocomplete:{digest}:{generations}'
+HITS_KEY = 'search:autocomplete:hits'
+MISSES_KEY = 'search:autocomplete:misses'
+
+
+def normalize_query(query):
+    """Case- and whitespace-insensitive form of a query, used as the cache key"""
+    return ' '.join(query.lower().split())
+
+
+def _incr(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Missing or evicted: start counting again
+        if cache.add(key, 1, timeout=None):
+            return 1
+        return cache.incr(key)
+
+
+def _seed_generation(key):
+    """Start a missing or evicted generation at the current time.
+
+    Restarting at 1 could land on a generation that cached responses, facet
+    snapshots or counts are still stored under, and serve them again.
+    """
+    cache.add(key, time.time_ns(), timeout=None)
+    return cache.get(key)
+
+
+def generations():
+    """Current generation of every indexed kind, as a tuple in KIND_CODES order"""
+    keys = [GENERATION_KEY.format(kind=kind) for kind in fts.KIND_CODES]
+    found = cache.get_many(keys)
+    return tuple(found[key] if key in found else _seed_generation(key) for key in keys)
+
+
+def generation(kind):
+    """Current generation of one indexed kind"""
+    key = GENERATION_KEY.format(kind=kind)
+    current = cache.get(key)
+    return _seed_generation(key) if current is None else current
+
+
+def bump_generation(kind):
+    """Invalidate every cached response or snapshot built from items of ``kind``"""
+    key = GENERATION_KEY.format(kind=kind)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        return _seed_generation(key)
+
+
+def _response_key(query):
+    digest = hashlib.md5(normalize_query(query).encode()).hexdigest()
+    return RESPONSE_KEY.format(digest=digest, generations='.'.join(str(g) for g in generations()))
+
+
+def get_response(query):
+    """Cached payload for ``query``, or None; counts the hit or miss"""
+    payload = cache.get(_response_key(query))
+    _incr(HITS_KEY if payload is not None else MISSES_KEY)
+    return payload
+
+
+def set_response(query, payload):
+    cache.set(_response_key(query), payload, settings.AUTOCOMPLETE_CACHE_TIMEOUT)
+
+
+def stats():
+    """Hit and miss counts since the counters were last reset"""
+    counts = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = counts.get(HITS_KEY, 0), counts.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_rate': hits / total if total else 0.0}
+
+
+def reset_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
@@ -0,0 +1,197 @@
+"""Ranked search across articles, journals, projects, news and researchers"""
+import base64
+import json
+import re
+from collections import namedtuple
+from functools import reduce
+from operator import or_, and_
+
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from app.models import Article, Journal, Project, NewsArticle, DirectoryApplication
+from app.search import fts
+
+SearchHit = namedtuple('SearchHit', ['kind', 'object', 'score', 'snippet'], defaults=[None])
+SearchPage = namedtuple('SearchPage', ['hits', 'next_cursor'])
+
+# Field weights follow the FTS column weights: title > keywords > abstract > body.
+TITLE, KEYWORDS, ABSTRACT, BODY = 10, 5, 2, 1
+
+SOURCES = {
+    'article': {
+        'model': Article,
+        'base': Q(status__in=['approved', 'pending']),
+        'fields': {
+            'title': TITLE, 'keywords': KEYWORDS, 'discipline': KEYWORDS,
+            'abstract': ABSTRACT, 'authors_names': BODY, 'journal_name': BODY,
+        },
+        'fts': True,
+    },
+    'journal': {
+        'model': Journal,
+        'base': Q(),
+        'fields': {
+            'journal_name': TITLE, 'subject_area': KEYWORDS, 'issn_print': KEYWORDS,
+            'issn_online': KEYWORDS, 'e_issn': KEYWORDS, 'journal_scope': ABSTRACT,
+            'publisher_name': BODY,
+        },
+        'fts': True,
+    },
+    'project': {
+        'model': Project,
+        'base': Q(),
+        'fields': {
+            'project_title': TITLE, 'category': KEYWORDS, 'institution': KEYWORDS,
+            'description': ABSTRACT,
+        },
+        'fts': True,
+    },
+    'news': {
+        'model': NewsArticle,
+        'base': Q(is_published=True),
+        'fields': {'title': TITLE, 'excerpt': ABSTRACT, 'content': BODY},
+        'fts': True,
+    },
+    'researcher': {
+        'model': DirectoryApplication,
+        'base': Q(terms_accepted=True),
+        'fields': {
+            'first_name': TITLE, 'last_name': TITLE, 'research_areas': KEYWORDS,
+            'position': ABSTRACT, 'institution': ABSTRACT,
+        },
+        'fts': False,
+    },
+}
+
+CONTENT_KINDS = ('article', 'journal', 'project', 'news')
+
+# How many FTS candidates to pull per round when filters discard some of them
+FTS_BATCH_SIZE = 100
+
+
+def encode_cursor(hit):
+    """Opaque keyset cursor pointing just after ``hit``"""
+    payload = json.dumps([hit.score, hit.kind, hit.object.pk])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return ``(score, kind, pk)`` for a cursor, or None if it is missing or malformed"""
+    if not cursor:
+        return None
+    try:
+        score, kind, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(score), str(kind), int(pk)
+    except (ValueError, TypeError):
+        return None
+
+
+def _sort_key(hit):
+    return (-hit.score, hit.kind, hit.object.pk)
+
+
+def _queryset(kind, filters, only):
+    source = SOURCES[kind]
+    queryset = source['model']._default_manager.filter(source['base'])
+    extra = filters.get(kind)
+    if extra:
+        queryset = queryset.filter(extra if isinstance(extra, Q) else Q(**extra))
+    if only.get(kind):
+        queryset = queryset.only(*only[kind])
+    return queryset
+
+
+def highlight(extract):
+    """HTML-escape an FTS snippet and turn its match markers into <mark> tags"""
+    return mark_safe(
+        escape(extract).replace(fts.SNIPPET_START, '<mark>').replace(fts.SNIPPET_END, '</mark>')
+    )
+
+
+def _fts_hits(query, kinds, filters, only, wanted, after, snippet_column=None):
+    """Rank with FTS5, then load (and filter) the matching rows batch by batch"""
+    hits = []
+    position = after
+    while len(hits) < wanted:
+        batch = fts.match(query, kinds=kinds, limit=FTS_BATCH_SIZE, after=position,
+                          snippet_column=snippet_column)
+        if not batch:
+            break
+        ids_by_kind = {}
+        for kind, object_id, *_ in batch:
+            ids_by_kind.setdefault(kind, []).append(object_id)
+        objects = {
+            kind: _queryset(kind, filters, only).in_bulk(ids)
+            for kind, ids in ids_by_kind.items()
+        }
+        for kind, object_id, score, *extract in batch:
+            obj = objects[kind].get(object_id)
+            if obj is not None:
+                hits.append(SearchHit(kind, obj, score, highlight(extract[0]) if extract else None))
+        if len(batch) < FTS_BATCH_SIZE:
+            break
+        position = batch[-1]
+    return hits[:wanted]
+
+
+def _orm_hits(query, kind, filters, only, wanted, after):
+    """Weighted icontains scoring for sources without a full-text index"""
+    terms = re.findall(r'\w+', query)
+    if not terms:
+        return []
+    fields = SOURCES[kind]['fields']
+    matches = reduce(and_, [
+        reduce(or_, [Q(**{f'{field}__icontains': term}) for field in fields])
+        for term in terms
+    ])
+    score = sum(
+        (Case(When(Q(**{f'{field}__icontains': term}), then=Value(weight)), default=Value(0),
+              output_field=IntegerField())
+         for term in terms for field, weight in fields.items()),
+        Value(0),
+    )
+    queryset = _queryset(kind, filters, only).filter(matches).annotate(search_score=score)
+    if after is not None:
+        last_score, last_kind, last_pk = after
+        if kind > last_kind:
+            queryset = queryset.filter(search_score__lte=last_score)
+        elif kind == last_kind:
+            queryset = queryset.filter(Q(search_score__lt=last_score) | Q(search_score=last_score, pk__gt=last_pk))
+        else:
+            queryset = queryset.filter(search_score__lt=last_score)
+    queryset = queryset.order_by('-search_score', 'pk')[:wanted]
+    return [SearchHit(kind, obj, float(obj.search_score)) for obj in queryset]
+
+
+def search(query, kinds=CONTENT_KINDS, filters=None, limit=20, cursor=None, only=None, snippet_column=None):
+    """Search one or more kinds and return a ``SearchPage`` of hits, best match first.
+
+    ``filters`` and ``only`` are dicts keyed by kind: filters hold a ``Q`` or a
+    dict of lookups applied on top of each kind's visibility rules, ``only``
+    lists the columns to load. Pass ``page.next_cursor`` back as ``cursor`` to
+    fetch the following page. Scores from the FTS5 index and from the
+    icontains fallback are on different scales, so mixing kinds from both in
+    one call gives a stable but not meaningful interleaving.
+
+    ``snippet_column`` ('title', 'keywords', 'abstract' or 'body') adds a
+    highlighted, HTML-safe extract of that index column to each FTS hit.
+    """
+    filters = filters or {}
+    only = only or {}
+    after = decode_cursor(cursor)
+    wanted = limit + 1
+
+    fts_kinds = [kind for kind in kinds if SOURCES[kind]['fts'] and fts.is_available()]
+    candidates = []
+    if fts_kinds:
+        candidates.extend(_fts_hits(query, fts_kinds, filters, only, wanted, after, snippet_column))
+    for kind in kinds:
+        if kind not in fts_kinds:
+            candidates.extend(_orm_hits(query, kind, filters, only, wanted, after))
+
+    candidates.sort(key=_sort_key)
+    hits = candidates[:limit]
+    next_cursor = encode_cursor(hits[-1]) if len(candidates) > limit else None
+    return SearchPage(hits, next_cursor)
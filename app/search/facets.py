@@ -0,0 +1,153 @@
+"""Facet counts for listing pages from one cached GROUP BY per model"""
+from collections import Counter, namedtuple
+from functools import reduce
+from operator import or_
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.db.models.functions import ExtractYear
+
+from app.models import Article, Project, ResearchArea
+from app.search.cache import generation
+
+Facet = namedtuple('Facet', ['param', 'lookup', 'expression', 'numeric', 'descending'])
+FacetCounts = namedtuple('FacetCounts', ['values', 'total'])
+
+SNAPSHOT_KEY = 'search:facets:{kind}:{generation}'
+RESEARCH_AREAS_KEY = 'search:facets:research_areas:{generation}:{limit}'
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+
+def facet(param, lookup, expression=None, numeric=False, descending=False):
+    """Describe one facet: its query parameter, the filter lookup and how to group by it"""
+    return Facet(param, lookup, expression, numeric, descending)
+
+
+class FacetSet:
+    """Counts and drill-down filters for a fixed set of facets over one model.
+
+    One GROUP BY over all facet columns is enough to derive every facet count
+    and drill-down total in Python. The grouped rows are cached under the
+    kind's generation counter, which is bumped whenever a row of the model is
+    saved or deleted, so page views between writes never re-aggregate.
+    """
+
+    def __init__(self, kind, model, base, facets):
+        self.kind = kind
+        self.model = model
+        self.base = base
+        self.facets = facets
+
+    def snapshot(self):
+        """``(value, ..., count)`` rows, one per distinct combination of facet values"""
+        key = SNAPSHOT_KEY.format(kind=self.kind, generation=generation(self.kind))
+        rows = cache.get(key)
+        if rows is None:
+            annotations = {f.param: f.expression for f in self.facets if f.expression is not None}
+            columns = [f.param if f.expression is not None else f.lookup for f in self.facets]
+            grouped = (
+                self.model._default_manager.filter(self.base)
+                .annotate(**annotations)
+                .values(*columns)
+                .annotate(facet_count=Count('pk'))
+                .order_by()
+            )
+            rows = [
+                tuple('' if row[column] in (None, '') else str(row[column]) for column in columns)
+                + (row['facet_count'],)
+                for row in grouped
+            ]
+            cache.set(key, rows, SNAPSHOT_TIMEOUT)
+        return rows
+
+    def selected_from_params(self, params):
+        """Read the drill-down selections from a QueryDict, dropping empty and malformed values"""
+        selected = {}
+        for f in self.facets:
+            values = {value for value in params.getlist(f.param) if value}
+            if f.numeric:
+                values = {value for value in values if value.isdigit()}
+            if values:
+                selected[f.param] = values
+        return selected
+
+    def filter_q(self, selected):
+        """Exact-match Q for the selected facet values"""
+        q = Q()
+        for f in self.facets:
+            values = selected.get(f.param)
+            if not values:
+                continue
+            if f.lookup.endswith('__year'):
+                # One year range per value, so the underlying date column's index is usable
+                q &= reduce(or_, [Q(**{f.lookup: int(value)}) for value in values])
+            else:
+                values = [int(value) for value in values] if f.numeric else list(values)
+                q &= Q(**{f'{f.lookup}__in': values})
+        return q
+
+    def counts(self, selected=None):
+        """Count every facet value under the current selection.
+
+        Each facet is counted with the selections of the *other* facets
+        applied, so picking one value still lists the alternatives with their
+        counts. ``total`` is the number of rows matching the whole selection.
+        """
+        selected = selected or {}
+        params = [f.param for f in self.facets]
+        counts = {param: Counter() for param in params}
+        total = 0
+        for row in self.snapshot():
+            values = dict(zip(params, row))
+            count = row[-1]
+            misses = [param for param, chosen in selected.items() if values[param] not in chosen]
+            if not misses:
+                total += count
+            if len(misses) > 1:
+                continue
+            for param, value in values.items():
+                if value and (not misses or misses == [param]):
+                    counts[param][value] += count
+
+        result = {}
+        for f in self.facets:
+            names = sorted(counts[f.param], key=int if f.numeric else None, reverse=f.descending)
+            result[f.param] = [
+                {'name': name, 'count': counts[f.param][name], 'selected': name in selected.get(f.param, ())}
+                for name in names
+            ]
+        return FacetCounts(result, total)
+
+
+article_facets = FacetSet('article', Article, Q(status__in=['approved', 'pending']), [
+    facet('subject', 'discipline'),
+    facet('journal', 'journal_name'),
+    facet('year', 'year_of_publication', numeric=True, descending=True),
+])
+
+project_facets = FacetSet('project', Project, Q(), [
+    facet('category', 'category'),
+    facet('institution', 'institution'),
+    facet('status', 'status'),
+    facet('year', 'created_at__year', expression=ExtractYear('created_at'), numeric=True, descending=True),
+])
+
+
+def research_area_counts(limit=20):
+    """The ``limit`` research areas with the most listed researchers, most first.
+
+    One GROUP BY over the area/researcher link table, cached under the
+    researcher generation, which directory entry saves, deletes and area
+    changes bump.
+    """
+    key = RESEARCH_AREAS_KEY.format(generation=generation('researcher'), limit=limit)
+    areas = cache.get(key)
+    if areas is None:
+        areas = [
+            {'name': area.name, 'count': area.count}
+            for area in ResearchArea.objects.filter(researchers__terms_accepted=True)
+            .annotate(count=Count('researchers'))
+            .order_by('-count', 'name')[:limit]
+        ]
+        cache.set(key, areas, SNAPSHOT_TIMEOUT)
+    return areas
@@ -0,0 +1,231 @@
+"""SQLite FTS5 index over Articles, Journals, Projects and News"""
+import html
+import re
+
+from django.db import connection
+from django.utils.html import strip_tags
+
+FTS_TABLE = 'app_search_fts'
+
+# Every indexed row gets a deterministic rowid (pk * KIND_COUNT + kind code) so
+# updates and deletes are a rowid lookup instead of a scan of the virtual table.
+KIND_CODES = {
+    'article': 0,
+    'journal': 1,
+    'project': 2,
+    'news': 3,
+}
+KIND_COUNT = 4
+
+COLUMNS = ('kind', 'object_id', 'title', 'keywords', 'abstract', 'body')
+
+# bm25() weights, one per column in table order: kind, object_id, title, keywords, abstract, body
+COLUMN_WEIGHTS = (0.0, 0.0, 10.0, 5.0, 2.0, 1.0)
+
+# snippet() markers around matched terms; control characters never occur in
+# indexed text, so the extract can be HTML-escaped before they become <mark> tags
+SNIPPET_START = '\x02'
+SNIPPET_END = '\x03'
+SNIPPET_TOKENS = 24
+
+CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "kind UNINDEXED, object_id UNINDEXED, title, keywords, abstract, body, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+DROP_SQL = f"DROP TABLE IF EXISTS {FTS_TABLE}"
+
+
+def is_available():
+    """The index only exists on SQLite databases"""
+    return connection.vendor == 'sqlite'
+
+
+def _join(*parts):
+    return ' '.join(str(p) for p in parts if p)
+
+
+def _text(value):
+    """Plain text of a possibly rich-text field: tags stripped and entities such as &nbsp; decoded"""
+    return html.unescape(strip_tags(value or ''))
+
+
+def _article_document(article):
+    if article.status not in ('approved', 'pending'):
+        return None
+    return {
+        'title': article.title,
+        'keywords': _join(article.keywords, article.discipline),
+        'abstract': _text(article.abstract),
+        'body': _join(article.authors_names, article.journal_name),
+    }
+
+
+def _journal_document(journal):
+    return {
+        'title': journal.journal_name,
+        'keywords': _join(journal.subject_area, journal.issn_print, journal.issn_online, journal.e_issn),
+        'abstract': _text(journal.journal_scope),
+        'body': journal.publisher_name,
+    }
+
+
+def _project_document(project):
+    return {
+        'title': project.project_title,
+        'keywords': _join(project.category, project.institution),
+        'abstract': _text(project.description),
+        'body': '',
+    }
+
+
+def _news_document(news):
+    if not news.is_published:
+        return None
+    tag_names = [tag.name for tag in news.tags.all()] if news.pk else []
+    return {
+        'title': news.title,
+        'keywords': _join(*tag_names),
+        'abstract': _text(news.excerpt),
+        'body': _text(news.content),
+    }
+
+
+DOCUMENT_BUILDERS = {
+    'article': _article_document,
+    'journal': _journal_document,
+    'project': _project_document,
+    'news': _news_document,
+}
+
+MODEL_NAMES = {
+    'article': 'Article',
+    'journal': 'Journal',
+    'project': 'Project',
+    'news': 'NewsArticle',
+}
+
+
+def kind_for_instance(instance):
+    """Return the index kind for a model instance, or None if it isn't indexed"""
+    model_name = instance._meta.object_name
+    for kind, name in MODEL_NAMES.items():
+        if name == model_name:
+            return kind
+    return None
+
+
+def _rowid(kind, pk):
+    return pk * KIND_COUNT + KIND_CODES[kind]
+
+
+def index_instance(instance):
+    """Insert or refresh the index row for an Article, Journal, Project or NewsArticle"""
+    if not is_available():
+        return
+    kind = kind_for_instance(instance)
+    if kind is None or instance.pk is None:
+        return
+    document = DOCUMENT_BUILDERS[kind](instance)
+    rowid = _rowid(kind, instance.pk)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [rowid])
+        if document is not None:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, kind, object_id, title, keywords, abstract, body) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                [rowid, kind, instance.pk, document['title'] or '', document['keywords'] or '',
+                 document['abstract'] or '', document['body'] or ''],
+            )
+
+
+def remove_instance(instance):
+    """Drop the index row for a deleted instance"""
+    if not is_available():
+        return
+    kind = kind_for_instance(instance)
+    if kind is None or instance.pk is None:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [_rowid(kind, instance.pk)])
+
+
+def rebuild(get_model=None):
+    """Recreate the index from scratch and return the number of rows indexed per kind.
+
+    ``get_model`` defaults to the live app registry; migrations pass ``apps.get_model``.
+    """
+    if not is_available():
+        return {}
+    if get_model is None:
+        from django.apps import apps
+        get_model = apps.get_model
+
+    counts = {}
+    with connection.cursor() as cursor:
+        cursor.execute(DROP_SQL)
+        cursor.execute(CREATE_SQL)
+        for kind, model_name in MODEL_NAMES.items():
+            model = get_model('app', model_name)
+            queryset = model.objects.all()
+            if kind == 'news':
+                queryset = queryset.prefetch_related('tags')
+            rows = []
+            for instance in queryset.iterator(chunk_size=500):
+                document = DOCUMENT_BUILDERS[kind](instance)
+                if document is None:
+                    continue
+                rows.append((_rowid(kind, instance.pk), kind, instance.pk, document['title'] or '',
+                             document['keywords'] or '', document['abstract'] or '', document['body'] or ''))
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, kind, object_id, title, keywords, abstract, body) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                rows,
+            )
+            counts[kind] = len(rows)
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    return counts
+
+
+def build_match_expression(query):
+    """Turn free text into an FTS5 expression where every word is a quoted prefix term"""
+    terms = re.findall(r'\w+', query.lower())
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def match(query, kinds=None, limit=20, after=None, snippet_column=None):
+    """Return ``(kind, object_id, score)`` tuples, best match first.
+
+    ``score`` is the negated bm25 rank, so higher is better. Ties are broken by
+    kind and object id, and ``after`` takes the last tuple of a previous call to
+    continue from there (keyset pagination). With ``snippet_column`` (one of
+    the indexed columns) each tuple gets a fourth item: a short extract of
+    that column with matched terms wrapped in SNIPPET_START/SNIPPET_END.
+    """
+    expression = build_match_expression(query)
+    if not expression or not is_available():
+        return []
+    kinds = list(kinds or KIND_CODES)
+    weights = ', '.join(str(w) for w in COLUMN_WEIGHTS)
+    placeholders = ', '.join(['%s'] * len(kinds))
+    snippet = ''
+    params = []
+    if snippet_column is not None:
+        snippet = f", snippet({FTS_TABLE}, %s, %s, %s, '…', %s) AS snippet"
+        params += [COLUMNS.index(snippet_column), SNIPPET_START, SNIPPET_END, SNIPPET_TOKENS]
+    params += [expression, *kinds]
+    keyset = ''
+    if after is not None:
+        score, kind, object_id = after[:3]
+        keyset = "WHERE score < %s OR (score = %s AND (kind > %s OR (kind = %s AND object_id > %s))) "
+        params += [score, score, kind, kind, object_id]
+    sql = (
+        f"SELECT kind, object_id, score{', snippet' if snippet else ''} FROM ("
+        f"SELECT kind, object_id, -bm25({FTS_TABLE}, {weights}) AS score{snippet} FROM {FTS_TABLE} "
+        f"WHERE {FTS_TABLE} MATCH %s AND kind IN ({placeholders})"
+        f") {keyset}ORDER BY score DESC, kind, object_id LIMIT %s"
+    )
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(row[0], int(row[1]), *row[2:]) for row in cursor.fetchall()]
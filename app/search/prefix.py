@@ -0,0 +1,208 @@
+"""In-memory title prefix index used to answer hero autocomplete without the database"""
+import heapq
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from collections import namedtuple
+
+from django.core.cache import cache
+
+from app.search import fts
+
+TitleEntry = namedtuple('TitleEntry', ['kind', 'id', 'title', 'slug', 'published_date'])
+
+# Shared stamp bumped on every indexed write; a worker whose copy was built
+# from an older stamp throws it away and reloads on its next lookup.
+VERSION_CACHE_KEY = 'search:title_index:version'
+
+MIN_QUERY_LENGTH = 2
+
+
+def normalize(text):
+    """Lowercase and strip accents so 'Énergie' and 'energie' index the same way"""
+    decomposed = unicodedata.normalize('NFKD', str(text or '').lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    return [''.join(ch for ch in word if ch.isalnum()) for word in normalize(text).split()]
+
+
+def _entry_for_instance(kind, instance):
+    """Build the index entry for an instance, or None if it shouldn't be suggested"""
+    if kind == 'article':
+        if instance.status not in ('approved', 'pending'):
+            return None
+        return TitleEntry(kind, instance.pk, instance.title, None, None)
+    if kind == 'journal':
+        return TitleEntry(kind, instance.pk, instance.journal_name, None, None)
+    if kind == 'project':
+        return TitleEntry(kind, instance.pk, instance.project_title, None, None)
+    if not instance.is_published:
+        return None
+    return TitleEntry(kind, instance.pk, instance.title, instance.slug, instance.published_date)
+
+
+def _load_entries():
+    from app.models import Article, Journal, Project, NewsArticle
+
+    sources = (
+        ('article', Article.objects.filter(status__in=['approved', 'pending']).only('id', 'title', 'status')),
+        ('journal', Journal.objects.only('id', 'journal_name')),
+        ('project', Project.objects.only('id', 'project_title')),
+        ('news', NewsArticle.objects.filter(is_published=True).only('id', 'title', 'slug', 'is_published', 'published_date')),
+    )
+    for kind, queryset in sources:
+        for instance in queryset.iterator(chunk_size=2000):
+            entry = _entry_for_instance(kind, instance)
+            if entry is not None:
+                yield entry
+
+
+def _current_version():
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(VERSION_CACHE_KEY, 1)
+        version = cache.get(VERSION_CACHE_KEY, 1)
+    return version
+
+
+def _bump_version():
+    try:
+        return cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.add(VERSION_CACHE_KEY, 1)
+        return cache.get(VERSION_CACHE_KEY, 1)
+
+
+class TitleIndex:
+    """Per-process prefix index over the titles of every suggestable item.
+
+    Titles are split into normalized tokens kept in one sorted list of
+    ``(token, kind, id)`` tuples, so a prefix lookup is a bisect followed by a
+    short scan. The index is built on first use, patched in place by the
+    save/delete signals of this process, and rebuilt when the shared version
+    stamp shows another process has written since it was loaded.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._phrases = {}
+        self._tokens = []
+        self.version = None
+
+    @property
+    def loaded(self):
+        return self.version is not None
+
+    def _add(self, entry):
+        key = (entry.kind, entry.id)
+        tokens = [token for token in tokenize(entry.title) if token]
+        self._entries[key] = entry
+        self._phrases[key] = ' '.join(tokens)
+        for token in set(tokens):
+            insort(self._tokens, (token, entry.kind, entry.id))
+
+    def _remove(self, kind, pk):
+        entry = self._entries.pop((kind, pk), None)
+        phrase = self._phrases.pop((kind, pk), '')
+        if entry is None:
+            return
+        for token in set(phrase.split()):
+            position = bisect_left(self._tokens, (token, kind, pk))
+            if position < len(self._tokens) and self._tokens[position] == (token, kind, pk):
+                del self._tokens[position]
+
+    def load(self):
+        """(Re)build the index from the database"""
+        with self._lock:
+            version = _current_version()
+            entries = {}
+            phrases = {}
+            tokens = []
+            for entry in _load_entries():
+                key = (entry.kind, entry.id)
+                title_tokens = [token for token in tokenize(entry.title) if token]
+                entries[key] = entry
+                phrases[key] = ' '.join(title_tokens)
+                tokens.extend((token, entry.kind, entry.id) for token in set(title_tokens))
+            tokens.sort()
+            self._entries = entries
+            self._phrases = phrases
+            self._tokens = tokens
+            self.version = version
+
+    def ensure_fresh(self):
+        if self.version is None or self.version != cache.get(VERSION_CACHE_KEY, self.version):
+            self.load()
+
+    def refresh(self, kind, pk, instance=None, deleted=False):
+        """Apply one saved ``instance`` (or the deletion of ``kind``/``pk``) and publish a new version stamp.
+
+        Deletions take the kind and pk captured before the delete, since the
+        collector has cleared ``instance.pk`` by the time on_commit runs.
+        """
+        if kind is None or pk is None:
+            return
+        with self._lock:
+            new_version = _bump_version()
+            if self.version is None:
+                return
+            if self.version + 1 != new_version:
+                # Someone else wrote in between; rebuild on the next lookup
+                self.version = None
+                return
+            self._remove(kind, pk)
+            entry = None if deleted else _entry_for_instance(kind, instance)
+            if entry is not None:
+                self._add(entry)
+            self.version = new_version
+
+    def _prefix_matches(self, term):
+        """Map ``(kind, id)`` to True for exact token matches, False for prefix-only ones"""
+        matches = {}
+        position = bisect_left(self._tokens, (term,))
+        while position < len(self._tokens):
+            token, kind, pk = self._tokens[position]
+            if not token.startswith(term):
+                break
+            matches[(kind, pk)] = matches.get((kind, pk), False) or token == term
+            position += 1
+        return matches
+
+    def lookup(self, query, limit=32):
+        """Return entries whose title has a word starting with every query word, best first"""
+        terms = [term for term in tokenize(query) if term]
+        if len(query.strip()) < MIN_QUERY_LENGTH or not terms:
+            return []
+        with self._lock:
+            self.ensure_fresh()
+            scores = None
+            for term in terms:
+                matches = self._prefix_matches(term)
+                if scores is None:
+                    scores = {key: 2 if exact else 1 for key, exact in matches.items()}
+                else:
+                    scores = {key: score + (2 if matches[key] else 1)
+                              for key, score in scores.items() if key in matches}
+                if not scores:
+                    return []
+            phrase = ' '.join(terms)
+            ranked = heapq.nsmallest(limit, (
+                (-(score + 3 if self._phrases[key].startswith(phrase) else score),
+                 len(self._phrases[key]), key)
+                for key, score in scores.items()
+            ))
+            return [self._entries[key] for _, _, key in ranked]
+
+    def recent_news(self, limit=8):
+        """Most recently published news entries"""
+        with self._lock:
+            self.ensure_fresh()
+            news = [entry for entry in self._entries.values() if entry.kind == 'news']
+        news.sort(key=lambda entry: (entry.published_date is not None, entry.published_date), reverse=True)
+        return news[:limit]
+
+
+title_index = TitleIndex()
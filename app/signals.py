@@ -0,0 +1,144 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from app import certificates, page_cache
+from app.models import (
+    Article, ArticleAuthor, Journal, JournalEditor, Project, ProjectContributor, NewsArticle, NewsTag, NewsWriter,
+    NewsComment, DirectoryApplication,
+)
+from app.search import fts
+from app.search import cache as autocomplete_cache
+from app.search.prefix import title_index
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Journal)
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=NewsArticle)
+def update_search_index(sender, instance, raw=False, **kwargs):
+    """Keep the full-text and title prefix indexes in sync with content saves"""
+    if raw:
+        return
+    fts.index_instance(instance)
+    kind, pk = fts.kind_for_instance(instance), instance.pk
+    transaction.on_commit(lambda: title_index.refresh(kind, pk, instance))
+
+
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Journal)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=NewsArticle)
+def remove_from_search_index(sender, instance, **kwargs):
+    """Drop deleted content from the full-text and title prefix indexes"""
+    fts.remove_instance(instance)
+    # Read now: the collector sets instance.pk to None before the transaction commits
+    kind, pk = fts.kind_for_instance(instance), instance.pk
+    transaction.on_commit(lambda: title_index.refresh(kind, pk, deleted=True))
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Journal)
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=NewsArticle)
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Journal)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=NewsArticle)
+def bump_search_generation(sender, instance, **kwargs):
+    """Bump the kind's generation so cached autocomplete responses and facet snapshots are not reused"""
+    kind = fts.kind_for_instance(instance)
+    transaction.on_commit(lambda: autocomplete_cache.bump_generation(kind))
+
+
+@receiver(m2m_changed, sender=NewsArticle.tags.through)
+def update_news_tags_in_search_index(sender, instance, action, reverse, **kwargs):
+    """Re-index news articles when their tags change (tag names are searchable)"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        for news in NewsArticle.objects.filter(tags=instance):
+            fts.index_instance(news)
+    else:
+        fts.index_instance(instance)
+
+
+@receiver(post_save, sender=DirectoryApplication)
+@receiver(post_delete, sender=DirectoryApplication)
+@receiver(m2m_changed, sender=DirectoryApplication.areas.through)
+def bump_researcher_generation(sender, action=None, **kwargs):
+    """Directory entries or their research areas changed; recount the area facet"""
+    if action is not None and action.startswith('pre_'):
+        return
+    transaction.on_commit(lambda: autocomplete_cache.bump_generation('researcher'))
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=ArticleAuthor)
+@receiver(post_save, sender=Journal)
+@receiver(post_save, sender=JournalEditor)
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=ProjectContributor)
+@receiver(post_save, sender=NewsArticle)
+@receiver(post_save, sender=NewsTag)
+@receiver(post_save, sender=NewsWriter)
+@receiver(post_save, sender=NewsComment)
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=ArticleAuthor)
+@receiver(post_delete, sender=Journal)
+@receiver(post_delete, sender=JournalEditor)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=ProjectContributor)
+@receiver(post_delete, sender=NewsArticle)
+@receiver(post_delete, sender=NewsTag)
+@receiver(post_delete, sender=NewsWriter)
+@receiver(post_delete, sender=NewsComment)
+def purge_cached_pages(sender, **kwargs):
+    """Stop serving cached pages, and change the detail page ETags, built from the changed model"""
+    transaction.on_commit(lambda: page_cache.bump_generation(sender))
+
+
+@receiver(m2m_changed, sender=NewsArticle.tags.through)
+@receiver(m2m_changed, sender=NewsComment.likes.through)
+@receiver(m2m_changed, sender=NewsComment.dislikes.through)
+def purge_cached_pages_for_relation(sender, instance, action, model, reverse, **kwargs):
+    """Tags or comment reactions changed; purge pages of the model that owns the relation"""
+    if action.startswith('pre_'):
+        return
+    owner = model if reverse else type(instance)
+    transaction.on_commit(lambda: page_cache.bump_generation(owner))
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def purge_landing_fragments(sender, **kwargs):
+    """Articles changed; re-render the landing page's latest articles block"""
+    transaction.on_commit(lambda: page_cache.purge_fragments(page_cache.LANDING_FRAGMENTS))
+
+
+@receiver(post_save, sender=NewsArticle)
+@receiver(post_save, sender=NewsTag)
+@receiver(post_delete, sender=NewsArticle)
+@receiver(post_delete, sender=NewsTag)
+@receiver(m2m_changed, sender=NewsArticle.tags.through)
+def purge_news_fragments(sender, action=None, **kwargs):
+    """News or their tags changed; re-render the latest and recommended news blocks"""
+    if action is not None and action.startswith('pre_'):
+        return
+    transaction.on_commit(lambda: page_cache.purge_fragments(page_cache.NEWS_FRAGMENTS))
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def purge_article_certificates(sender, instance, **kwargs):
+    """Drop stored certificates of a changed or deleted article"""
+    # Read now: a delete clears instance.pk before the transaction commits
+    pk = instance.pk
+    transaction.on_commit(lambda: certificates.invalidate(pk))
+
+
+@receiver(post_save, sender=ArticleAuthor)
+@receiver(post_delete, sender=ArticleAuthor)
+def purge_author_certificates(sender, instance, **kwargs):
+    """Author names are printed on certificates; drop the article's stored copies"""
+    transaction.on_commit(lambda: certificates.invalidate(instance.article_id))
@@ -0,0 +1,484 @@
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from app import analytics, page_cache
+from app.comment_threads import load_thread
+from app.models import AnalyticsDaily, AnalyticsEvent, Article, NewsArticle, NewsComment, Project, SiteSettings, UserProfile
+from app.pagination import decode_cursor, encode_cursor, keyset_paginate
+from app.search import cache as search_cache, search
+from app.search.facets import article_facets
+from app.search.prefix import TitleIndex, title_index
+from app.view_counts import view_counts
+
+# Keep test runs out of the shared on-disk cache the site uses
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'app-tests'}}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class AppTestCase(TestCase):
+    """Runs against a private LocMemCache, emptied before every test"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+
+class CommentThreadTests(AppTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.article = NewsArticle.objects.create(title='Thread', slug='thread', content='Body', is_published=True)
+        cls.viewer = User.objects.create_user('viewer', password='secret')
+        cls.users = [User.objects.create_user(f'reader{i}', password='secret') for i in range(5)]
+        cls.comments = []
+        for i, user in enumerate(cls.users):
+            comment = NewsComment.objects.create(article=cls.article, user=user, content=f'Comment {i}')
+            for replier in cls.users[:i]:
+                NewsComment.objects.create(article=cls.article, user=replier, parent=comment, content='Reply')
+            NewsComment.objects.create(article=cls.article, user=user, parent=comment, content='Hidden', is_approved=False)
+            cls.comments.append(comment)
+        for liker in cls.users:
+            cls.comments[0].toggle_reaction(liker, 'likes')
+        cls.comments[0].toggle_reaction(cls.viewer, 'likes')
+        cls.comments[1].toggle_reaction(cls.viewer, 'dislikes')
+
+    def render_rows(self, thread):
+        return [
+            (comment.user.username, comment.replies_count, comment.likes_count,
+             comment.dislikes_count, comment.user_liked, comment.user_disliked)
+            for comment in thread.comments
+        ]
+
+    def test_page_loads_in_fixed_queries(self):
+        with self.assertNumQueries(2):
+            thread = load_thread(self.article, self.viewer, limit=3)
+            rows = self.render_rows(thread)
+        self.assertEqual(thread.total, 5)
+        self.assertEqual(rows, [
+            ('reader4', 4, 0, 0, False, False),
+            ('reader3', 3, 0, 0, False, False),
+            ('reader2', 2, 0, 0, False, False),
+        ])
+
+        with self.assertNumQueries(2):
+            thread = load_thread(self.article, self.viewer, cursor=thread.next_cursor, limit=3)
+            rows = self.render_rows(thread)
+        self.assertIsNone(thread.next_cursor)
+        self.assertEqual(rows, [
+            ('reader1', 1, 0, 1, False, True),
+            ('reader0', 0, 6, 0, True, False),
+        ])
+
+    def test_anonymous_viewer_has_no_reactions(self):
+        with self.assertNumQueries(2):
+            thread = load_thread(self.article, AnonymousUser())
+            rows = self.render_rows(thread)
+        self.assertEqual(len(rows), 5)
+        self.assertFalse(any(row[4] or row[5] for row in rows))
+
+
+class NewsCommentReactionTests(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        article = NewsArticle.objects.create(title='Reactions', slug='reactions', content='Body', is_published=True)
+        self.user = User.objects.create_user('reactor')
+        self.comment = NewsComment.objects.create(article=article, user=self.user, content='Comment')
+
+    def counts(self):
+        stored = NewsComment.objects.values_list('likes_count', 'dislikes_count').get(pk=self.comment.pk)
+        self.assertEqual(stored, (self.comment.likes_count, self.comment.dislikes_count))
+        return stored
+
+    def test_like_then_unlike(self):
+        self.assertTrue(self.comment.toggle_reaction(self.user, 'likes'))
+        self.assertEqual(self.counts(), (1, 0))
+        self.assertTrue(self.comment.likes.filter(pk=self.user.pk).exists())
+
+        self.assertFalse(self.comment.toggle_reaction(self.user, 'likes'))
+        self.assertEqual(self.counts(), (0, 0))
+        self.assertFalse(self.comment.likes.exists())
+
+    def test_switching_reaction_moves_both_counts(self):
+        self.comment.toggle_reaction(self.user, 'likes')
+        self.assertTrue(self.comment.toggle_reaction(self.user, 'dislikes'))
+        self.assertEqual(self.counts(), (0, 1))
+        self.assertFalse(self.comment.likes.exists())
+
+        self.assertTrue(self.comment.toggle_reaction(self.user, 'likes'))
+        self.assertEqual(self.counts(), (1, 0))
+        self.assertFalse(self.comment.dislikes.exists())
+
+    def test_refresh_repairs_counts_after_direct_edits(self):
+        others = [User.objects.create_user(f'other{i}') for i in range(3)]
+        self.comment.likes.add(self.user, *others[:2])
+        self.comment.dislikes.add(others[2])
+        self.assertEqual(self.counts(), (0, 0))
+
+        self.comment.refresh_reaction_counts()
+        self.assertEqual(self.counts(), (3, 1))
+
+
+class KeysetPaginationTests(AppTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Every row falls in the same millisecond, apart only by microseconds
+        joined = datetime(2025, 1, 1, 12, 0, 0, 123000, tzinfo=timezone.utc)
+        for i in range(7):
+            User.objects.create(username=f'user{i}', date_joined=joined + timedelta(microseconds=(i * 3) % 7 * 10))
+        cls.users = User.objects.all()
+
+    def walk(self, ordering, limit=2):
+        names, cursor = [], None
+        for _ in range(self.users.count()):
+            page = keyset_paginate(self.users, ordering, limit, cursor)
+            names += [user.username for user in page.items]
+            if not page.next_cursor:
+                break
+            cursor = page.next_cursor
+        return names
+
+    def test_cursor_keeps_microseconds(self):
+        value = datetime(2025, 1, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+        self.assertEqual(decode_cursor(encode_cursor([value, 5]), 2), [value, 5])
+
+    def test_pages_within_one_millisecond(self):
+        for ordering in (('date_joined', 'id'), ('-date_joined', '-id')):
+            expected = [user.username for user in self.users.order_by(*ordering)]
+            self.assertEqual(self.walk(ordering), expected)
+
+
+class ListAccountsPaginationTests(AppTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        joined = datetime(2025, 1, 1, 12, 0, 0, 123000, tzinfo=timezone.utc)
+        cls.reader = User.objects.create_user('reader', password='secret')
+        for i in range(45):
+            # Several pages' worth of accounts joined within the same millisecond
+            user = User.objects.create(username=f'member{i:02d}',
+                                       date_joined=joined + timedelta(microseconds=(i * 7) % 45 * 10))
+            UserProfile.objects.create(user=user)
+
+    def walk(self, sort):
+        self.client.force_login(self.reader)
+        names, url = [], f'/list_accounts/?sort={sort}'
+        for _ in range(10):
+            response = self.client.get(url)
+            names += [user.username for user in response.context['users']]
+            if not response.context['next_page_url']:
+                break
+            url = '/list_accounts/' + response.context['next_page_url']
+        return names
+
+    def test_pages_have_no_duplicates_or_gaps(self):
+        users = User.objects.filter(profile__isnull=False)
+        for sort, ordering in (('oldest', ('date_joined', 'id')), ('recent', ('-date_joined', '-id'))):
+            expected = [user.username for user in users.order_by(*ordering)]
+            self.assertEqual(self.walk(sort), expected)
+
+
+class TemplatesVersionTests(AppTestCase):
+    @override_settings(DEBUG=True)
+    def test_touching_a_template_changes_the_version(self):
+        template = Path(__file__).resolve().parent / 'templates' / 'app' / 'news_detail.html'
+        stat = template.stat()
+        self.addCleanup(os.utime, template, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        before = page_cache.templates_version()
+        self.assertNotEqual(before, '0-0')
+        os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9 * 3600))
+        self.assertNotEqual(page_cache.templates_version(), before)
+
+
+class NewsDetailConditionalTests(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        SiteSettings.get_settings()
+        self.addCleanup(view_counts.flush)
+        self.article = NewsArticle.objects.create(title='Etag', slug='etag', content='Body', is_published=True)
+        self.client.force_login(User.objects.create_user('bookmarker', password='secret'))
+
+    def test_bookmark_toggle_changes_etag(self):
+        etag = self.client.get('/news/etag/')['ETag']
+        self.assertEqual(self.client.get('/news/etag/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.client.post('/news/etag/bookmark/')
+        response = self.client.get('/news/etag/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['is_bookmarked'])
+
+
+    def test_if_modified_since_alone_does_not_hide_a_bookmark(self):
+        self.assertNotIn('Last-Modified', self.client.get('/news/etag/'))
+        self.client.post('/news/etag/bookmark/')
+        response = self.client.get('/news/etag/', HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['is_bookmarked'])
+
+
+class PageTimeoutTests(AppTestCase):
+    def test_shared_cache_keeps_pages_for_a_day(self):
+        with self.settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                                               'LOCATION': '/tmp/app-tests-cache'}}):
+            self.assertEqual(page_cache.page_timeout(), page_cache.PAGE_TIMEOUT)
+
+    def test_process_local_cache_keeps_pages_briefly(self):
+        self.assertEqual(page_cache.page_timeout(), page_cache.LOCAL_PAGE_TIMEOUT)
+
+    def test_news_fragments_use_the_page_timeout(self):
+        SiteSettings.get_settings()
+        response = self.client.get('/news/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['fragment_cache_timeout'], page_cache.LOCAL_PAGE_TIMEOUT)
+
+
+class DisabledPagesTests(AppTestCase):
+    def test_memo_follows_the_settings_it_was_built_from(self):
+        settings = SiteSettings.get_settings()
+        settings.enable_project_archive_page = False
+        with self.captureOnCommitCallbacks(execute=True):
+            settings.save()
+        self.assertIn('enable_project_archive_page', SiteSettings.disabled_pages())
+        self.assertEqual(SiteSettings._disabled_pages[0], SiteSettings._cached[0])
+
+        settings.enable_project_archive_page = True
+        with self.captureOnCommitCallbacks(execute=True):
+            settings.save()
+        self.assertNotIn('enable_project_archive_page', SiteSettings.disabled_pages())
+        self.assertEqual(SiteSettings._disabled_pages[0], SiteSettings.cache_version())
+
+
+class SearchIndexTextTests(AppTestCase):
+    def test_entities_are_decoded_before_indexing(self):
+        NewsArticle.objects.create(
+            title='Entities', slug='entities', is_published=True,
+            content='<p>Fish&nbsp;&amp;&nbsp;chips at the caf&eacute; isn&#39;t cheap</p>',
+        )
+        self.assertEqual(search('nbsp', kinds=['news']).hits, [])
+        hits = search('chips', kinds=['news'], snippet_column='body').hits
+        self.assertEqual(len(hits), 1)
+        self.assertIn('&amp; <mark>chips</mark> at the café isn&#x27;t cheap', hits[0].snippet.replace('\xa0', ' '))
+
+
+class ViewCounterTests(AppTestCase):
+    @override_settings(VIEW_COUNT_FLUSH_INTERVAL=10)
+    def test_add_leaves_due_writes_to_the_timer(self):
+        project = Project.objects.create(project_title='Counted', category='x', institution='y', status='completed')
+        view_counts.flush()
+        view_counts._last_flush -= 60
+        with mock.patch('app.view_counts.threading.Timer') as timer, self.assertNumQueries(0):
+            view_counts.add(Project, project.pk)
+            view_counts.add(Project, project.pk, event='download')
+        timer.assert_called_once_with(0, view_counts._flush_from_timer)
+        view_counts._timer = None
+
+        self.assertEqual(view_counts.flush(), 2)
+        project.refresh_from_db()
+        self.assertEqual((project.views, project.downloads), (1, 1))
+        self.assertEqual(AnalyticsEvent.objects.count(), 2)
+
+
+class AnalyticsRollupTests(AppTestCase):
+    def test_since_skips_days_that_may_be_pruned(self):
+        now = datetime.now(timezone.utc)
+        old_day = (now - timedelta(days=95)).date()
+        AnalyticsDaily.objects.create(object_type='project', object_id=1, event='view', day=old_day, count=50)
+        # All that pruning left of that day
+        AnalyticsEvent.objects.create(object_type='project', object_id=1, event='view', count=1)
+        AnalyticsEvent.objects.update(created_at=now - timedelta(days=95))
+        AnalyticsEvent.objects.create(object_type='project', object_id=1, event='view', count=3)
+
+        analytics.rollup(since=old_day, keep_days=90)
+        totals = dict(AnalyticsDaily.objects.values_list('day', 'count'))
+        self.assertEqual(totals[old_day], 50)
+        self.assertEqual(totals[now.date()], 3)
+
+
+class AnonymousPageCacheTests(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        SiteSettings.get_settings()
+        self.addCleanup(view_counts.flush)
+        self.article = NewsArticle.objects.create(title='First headline', slug='purged', content='Body', is_published=True)
+
+    def test_saving_the_article_purges_its_page(self):
+        self.assertContains(self.client.get('/news/purged/'), 'First headline')
+        # Served from the cache: only the view-count lookup on a hit
+        with self.assertNumQueries(1):
+            self.assertContains(self.client.get('/news/purged/'), 'First headline')
+
+        self.article.title = 'Second headline'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.save()
+        response = self.client.get('/news/purged/')
+        self.assertContains(response, 'Second headline')
+        self.assertNotContains(response, 'First headline')
+
+    def test_evicted_generation_does_not_revive_old_pages(self):
+        self.assertContains(self.client.get('/news/purged/'), 'First headline')
+        self.article.title = 'Second headline'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.save()
+        self.assertContains(self.client.get('/news/purged/'), 'Second headline')
+
+        cache.delete(page_cache.GENERATION_KEY.format(label='app.newsarticle'))
+        self.assertNotContains(self.client.get('/news/purged/'), 'First headline')
+
+    def test_new_comment_purges_the_page(self):
+        self.assertNotContains(self.client.get('/news/purged/'), 'A fresh comment')
+        with self.captureOnCommitCallbacks(execute=True):
+            NewsComment.objects.create(article=self.article, user=User.objects.create_user('commenter'),
+                                       content='A fresh comment')
+        self.assertContains(self.client.get('/news/purged/'), 'A fresh comment')
+
+
+def make_article(title, discipline, journal_name, year, status='approved', **fields):
+    return Article.objects.create(
+        title=title, article_type='research', discipline=discipline, abstract=fields.pop('abstract', 'Abstract'),
+        keywords=fields.pop('keywords', 'keywords'), article_file='articles/test.pdf',
+        journal_name=journal_name, year_of_publication=year, status=status, **fields,
+    )
+
+
+class ArticleFacetTests(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        make_article('One', 'Biology', 'Nature', 2023)
+        make_article('Two', 'Biology', 'Science', 2024)
+        make_article('Three', 'Physics', 'Nature', 2024)
+        make_article('Four', 'Physics', 'Nature', 2024, status='pending')
+        make_article('Hidden', 'Biology', 'Nature', 2024, status='rejected')
+
+    def counts(self, **selected):
+        facet_counts = article_facets.counts({param: set(values) for param, values in selected.items()})
+        values = {param: {row['name']: row['count'] for row in rows} for param, rows in facet_counts.values.items()}
+        return values, facet_counts.total
+
+    def test_drill_down_counts(self):
+        values, total = self.counts()
+        self.assertEqual(total, 4)
+        self.assertEqual(values['subject'], {'Biology': 2, 'Physics': 2})
+        self.assertEqual(values['journal'], {'Nature': 3, 'Science': 1})
+        self.assertEqual(values['year'], {'2023': 1, '2024': 3})
+
+        # Other facets narrow to the selection; the selected facet keeps its alternatives
+        values, total = self.counts(subject=['Physics'])
+        self.assertEqual(total, 2)
+        self.assertEqual(values['subject'], {'Biology': 2, 'Physics': 2})
+        self.assertEqual(values['journal'], {'Nature': 2})
+        self.assertEqual(values['year'], {'2024': 2})
+
+        values, total = self.counts(subject=['Biology'], year=['2024'])
+        self.assertEqual(total, 1)
+        self.assertEqual(values['journal'], {'Science': 1})
+        self.assertEqual(values['year'], {'2023': 1, '2024': 1})
+
+    def test_snapshot_follows_writes(self):
+        self.assertEqual(self.counts()[1], 4)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_article('Five', 'Chemistry', 'Science', 2025)
+        values, total = self.counts()
+        self.assertEqual(total, 5)
+        self.assertEqual(values['subject']['Chemistry'], 1)
+
+    def test_evicted_generation_does_not_revive_old_snapshots(self):
+        self.assertEqual(self.counts()[1], 4)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_article('Five', 'Chemistry', 'Science', 2025)
+        self.assertEqual(self.counts()[1], 5)
+
+        cache.delete(search_cache.GENERATION_KEY.format(kind='article'))
+        self.assertEqual(self.counts()[1], 5)
+
+    def test_listing_total_matches_the_drill_down(self):
+        response = self.client.get('/indexed_articles/', {'subject': 'Physics', 'journal': 'Nature'})
+        self.assertEqual(response.context['total_records'], 2)
+        self.assertEqual({row['article'].title for row in response.context['articles_with_time']}, {'Three', 'Four'})
+
+
+class SearchRankingTests(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        # Title matches outrank keyword matches, which outrank abstract-only matches
+        make_article('Quantum tunnelling in enzymes', 'Biology', 'Nature', 2024)
+        make_article('Quantum dots for imaging', 'Physics', 'Nature', 2024)
+        make_article('Superconductors', 'Physics', 'Science', 2023, keywords='quantum, materials')
+        for i in range(4):
+            make_article(f'Lattice study {i}', 'Physics', 'Science', 2022, abstract=f'A quantum model, part {i}')
+        make_article('Quantum rejected', 'Physics', 'Science', 2022, status='rejected')
+        make_article('Unrelated', 'Biology', 'Nature', 2022)
+
+    def walk(self, limit):
+        titles, cursor = [], None
+        for _ in range(10):
+            page = search('quantum', kinds=['article'], limit=limit, cursor=cursor)
+            titles += [hit.object.title for hit in page.hits]
+            if not page.next_cursor:
+                break
+            cursor = page.next_cursor
+        return titles
+
+    def test_ranking_is_stable_across_pages(self):
+        everything = self.walk(limit=20)
+        self.assertEqual(len(everything), 7)
+        self.assertEqual(set(everything[:2]), {'Quantum tunnelling in enzymes', 'Quantum dots for imaging'})
+        self.assertEqual(everything[2], 'Superconductors')
+        self.assertNotIn('Quantum rejected', everything)
+        for limit in (1, 2, 3):
+            self.assertEqual(self.walk(limit), everything)
+
+
+class ArticleCertificateTests(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = Path(root.name)
+        override = self.settings(CERTIFICATE_CACHE_ROOT=self.root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_unknown_article_is_rendered_without_storing(self):
+        response = self.client.get('/indexed_articles/certificate/987654/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        self.assertEqual(list(self.root.iterdir()), [])
+
+    def test_deleting_the_article_drops_its_certificates(self):
+        article = make_article('Deleted', 'Biology', 'Nature', 2024)
+        b''.join(self.client.get(f'/indexed_articles/certificate/{article.pk}/').streaming_content)
+        stored = self.root / str(article.pk)
+        self.assertTrue(stored.exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                article.delete()
+        self.assertFalse(stored.exists())
+
+    def test_real_article_certificate_is_stored(self):
+        article = make_article('Stored', 'Biology', 'Nature', 2024)
+        response = self.client.get(f'/indexed_articles/certificate/{article.pk}/')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        self.assertEqual(len(list((self.root / str(article.pk)).iterdir())), 1)
+
+
+class TitleIndexTests(AppTestCase):
+    def titles(self, index, query):
+        return [entry.title for entry in index.lookup(query)]
+
+    def test_delete_inside_a_transaction_reaches_other_workers(self):
+        article = make_article('Zebrafish regeneration', 'Biology', 'Nature', 2024)
+        other_worker = TitleIndex()
+        title_index.load()
+        self.assertTrue(self.titles(other_worker, 'zebrafish'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                article.delete()
+        self.assertEqual(self.titles(title_index, 'zebrafish'), [])
+        self.assertEqual(self.titles(other_worker, 'zebrafish'), [])
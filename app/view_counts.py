@@ -0,0 +1,121 @@
+"""Write-behind view and download counters: events are summed in memory and written in batches"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+logger = logging.getLogger(__name__)
+
+# Rows per UPDATE, well under SQLite's bound-parameter limit
+FLUSH_BATCH_SIZE = 500
+
+
+def _counted_field(model, event):
+    from app.models import Blog, NewsArticle, Project
+    return {
+        (Project, 'view'): 'views',
+        (Project, 'download'): 'downloads',
+        (NewsArticle, 'view'): 'view_count',
+        (Blog, 'view'): 'views',
+    }[(model, event)]
+
+
+class ViewCounter:
+    """Per-process buffer of view/download count increments keyed by ``(model, pk, event)``.
+
+    ``add`` only touches memory. Pending deltas are written at most every
+    ``VIEW_COUNT_FLUSH_INTERVAL`` seconds by a background timer thread, never
+    by the request, as one ``F()`` + CASE UPDATE per model, event and batch,
+    so concurrent views are never lost and the database sees one write per
+    interval instead of one per view. The same batch is appended to the
+    AnalyticsEvent log in the same transaction. Whatever is left is flushed
+    when the worker exits. An interval of 0 writes each view as soon as the
+    timer thread runs.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._deltas = Counter()
+        self._last_flush = time.monotonic()
+        self._timer = None
+        self._exit_hook = False
+
+    @property
+    def interval(self):
+        return getattr(settings, 'VIEW_COUNT_FLUSH_INTERVAL', 10)
+
+    def add(self, model, pk, count=1, event='view'):
+        """Count ``count`` views (or other ``event``s) of one row; never writes to the database itself"""
+        with self._lock:
+            self._deltas[(model, pk, event)] += count
+            if not self._exit_hook:
+                atexit.register(self.flush)
+                self._exit_hook = True
+            if self._timer is None:
+                delay = max(0, self.interval - (time.monotonic() - self._last_flush))
+                self._timer = threading.Timer(delay, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def pending(self, model, pk, event='view'):
+        """Views (or other ``event``s) of one row counted here but not written yet"""
+        with self._lock:
+            return self._deltas[(model, pk, event)]
+
+    def flush(self):
+        """Write every pending delta; deltas that fail to write are kept for the next flush"""
+        with self._lock:
+            deltas, self._deltas = self._deltas, Counter()
+            self._last_flush = time.monotonic()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not deltas:
+            return 0
+
+        from app.models import AnalyticsEvent
+
+        grouped = defaultdict(dict)
+        for (model, pk, event), delta in deltas.items():
+            if delta:
+                grouped[(model, event)][pk] = delta
+        written = 0
+        for (model, event), rows in grouped.items():
+            field = _counted_field(model, event)
+            pks = list(rows)
+            for start in range(0, len(pks), FLUSH_BATCH_SIZE):
+                batch = {pk: rows[pk] for pk in pks[start:start + FLUSH_BATCH_SIZE]}
+                increment = Case(
+                    *[When(pk=pk, then=Value(delta)) for pk, delta in batch.items()],
+                    output_field=IntegerField(),
+                )
+                try:
+                    with transaction.atomic():
+                        model._default_manager.filter(pk__in=batch).update(**{field: F(field) + increment})
+                        AnalyticsEvent.objects.bulk_create([
+                            AnalyticsEvent(object_type=model._meta.model_name, object_id=pk, event=event, count=delta)
+                            for pk, delta in batch.items()
+                        ])
+                except DatabaseError:
+                    logger.exception('Could not write %d %s %s counts; keeping them for the next flush',
+                                     len(batch), model.__name__, event)
+                    with self._lock:
+                        self._deltas.update({(model, pk, event): delta for pk, delta in batch.items()})
+                    continue
+                written += len(batch)
+        return written
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            # The timer thread opened its own connection; don't leak it
+            connection.close()
+
+
+view_counts = ViewCounter()
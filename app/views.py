@@ -2,13 +2,21 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
+from django.db.models import BooleanField, Count, Exists, Max, OuterRef, Q, Value, prefetch_related_objects
 from django.contrib.auth.models import User
 from django.http import HttpResponse, JsonResponse, HttpResponseNotFound
 from django.template.loader import render_to_string
 from django.core.mail import send_mail
 from django.conf import settings
-from app.decorators import check_page_enabled
+from app import page_cache
+from app.comment_threads import load_thread, with_thread_data
+from app.decorators import cache_for_anonymous, check_page_enabled, conditional_page, prerendered
+from app.search import search
+from app.search import cache as autocomplete_cache
+from app.search.facets import article_facets, project_facets, research_area_counts
+from app.search.prefix import title_index
+from app.pagination import keyset_paginate
+from app.view_counts import view_counts
 import time
 import csv
 import io
@@ -27,10 +35,11 @@ from .models import (
     NewsTag, NewsWriter, NewsArticle, NewsComment, NewsBookmark
 )
 
+@cache_for_anonymous(Article)
 def landing(request):
     """Landing page view"""
     from app.models import SiteSettings
-    site_settings = SiteSettings.get_settings()
+    site_settings = SiteSettings.for_request(request)
     
     # Check if landing page is enabled
     if not site_settings.enable_landing_page:
@@ -48,8 +57,6 @@ def landing(request):
 
 def browse(request):
     """Browse articles view"""
-    from django.db.models import Q
-    
     # Get search query from GET parameter or form
     search_query = request.GET.get('search', '').strip()
     search_form = SearchForm(request.GET or None)
@@ -57,23 +64,39 @@ def browse(request):
     # If search parameter is provided, use it
     if search_query:
         search_form = SearchForm({'query': search_query})
-        results = Article.objects.filter(
-            Q(title__icontains=search_query) | Q(abstract__icontains=search_query)
-        )
+        query = search_query
     elif search_form.is_valid():
         query = search_form.cleaned_data['query']
-        # Search articles in database
-        results = Article.objects.filter(
-            Q(title__icontains=query) | Q(abstract__icontains=query)
-        )
     else:
-        results = Article.objects.none()
+        query = ''
+    
+    results = []
+    next_page_url = None
+    if query:
+        # Search approved articles in the shared search index, best matches first,
+        # loading only the columns the result cards show
+        page = search(
+            query, kinds=['article'], limit=20, cursor=request.GET.get('cursor'),
+            filters={'article': {'status': 'approved'}},
+            only={'article': ['id', 'title', 'abstract', 'publication_date']},
+        )
+        results = [hit.object for hit in page.hits]
+        next_page_url = _with_cursor(request, page.next_cursor)
     
     return render(request, 'app/browse.html', {
         'search_form': search_form,
         'results': results,
+        'next_page_url': next_page_url,
     })
 
+def _with_cursor(request, cursor):
+    """Current URL with the pagination cursor replaced, or None when there is no next page"""
+    if not cursor:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return f'?{params.urlencode()}'
+
 def submit(request):
     """Submit research view"""
     contact_form = ContactForm(request.POST or None)
@@ -191,27 +214,19 @@ def logout_view(request):
     return redirect('app:landing')
 
 @check_page_enabled('enable_indexed_articles_page')
+@cache_for_anonymous(Article, ArticleAuthor)
 def indexed_articles(request):
     """Indexed Articles page view"""
     from django.utils import timezone
-    from datetime import timedelta
-    from django.db.models import Count
+    from urllib.parse import urlencode
     from django.core.paginator import Paginator
     
-    # Show both approved and pending articles
-    articles = Article.objects.filter(status__in=['approved', 'pending']).order_by('-created_at')
-    
-    # Get unique disciplines (subjects) with counts
-    subjects = Article.objects.filter(status__in=['approved', 'pending']).values('discipline').annotate(count=Count('id')).order_by('discipline')
-    subjects_list = [{'name': s['discipline'], 'count': s['count']} for s in subjects if s['discipline']]
-    
-    # Get unique journals with counts
-    journals = Article.objects.filter(status__in=['approved', 'pending']).exclude(journal_name='').values('journal_name').annotate(count=Count('id')).order_by('journal_name')
-    journals_list = [{'name': j['journal_name'], 'count': j['count']} for j in journals if j['journal_name']]
+    # Show both approved and pending articles, narrowed by any subject/journal/year drill-down
+    selected = article_facets.selected_from_params(request.GET)
+    articles = Article.objects.filter(status__in=['approved', 'pending']).filter(article_facets.filter_q(selected)).order_by('-created_at')
     
-    # Get unique years with counts
-    years = Article.objects.filter(status__in=['approved', 'pending']).exclude(year_of_publication__isnull=True).values('year_of_publication').annotate(count=Count('id')).order_by('-year_of_publication')
-    years_list = [{'name': str(y['year_of_publication']), 'count': y['count']} for y in years if y['year_of_publication']]
+    # Subject, journal and year counts (and the total) from the cached facet snapshot
+    facet_counts = article_facets.counts(selected)
     
     # Pagination
     try:
@@ -221,6 +236,7 @@ def indexed_articles(request):
     except (ValueError, TypeError):
         per_page = 40
     paginator = Paginator(articles, per_page)
+    paginator.count = facet_counts.total  # already known from the snapshot, skip the COUNT query
     page_number = request.GET.get('page', 1)
     page_obj = paginator.get_page(page_number)
     
@@ -258,9 +274,10 @@ def indexed_articles(request):
     return render(request, 'app/indexed_articles.html', {
         'articles_with_time': articles_with_time,
         'articles': articles,
-        'subjects': subjects_list,
-        'journals': journals_list,
-        'years': years_list,
+        'subjects': facet_counts.values['subject'],
+        'journals': facet_counts.values['journal'],
+        'years': facet_counts.values['year'],
+        'facet_query': urlencode({facet: sorted(values) for facet, values in selected.items()}, doseq=True),
         'page_obj': page_obj,
         'start_record': start_record,
         'end_record': end_record,
@@ -268,6 +285,17 @@ def indexed_articles(request):
         'per_page': per_page,
     })
 
+def _article_etag(request, article_id):
+    """ETag from the article's updated_at, its author count and the article/author page generations"""
+    row = Article.objects.filter(id=article_id).annotate(
+        author_count=Count('authors')
+    ).values_list('updated_at', 'author_count').first()
+    if row is None:
+        return None
+    updated_at, author_count = row
+    return page_cache.page_etag(request, updated_at, author_count, page_cache.generations((Article, ArticleAuthor)))
+
+@conditional_page(_article_etag)
 def article_detail(request, article_id):
     """Article detail page view"""
     from django.shortcuts import get_object_or_404
@@ -448,36 +476,19 @@ def article_detail(request, article_id):
     })
 
 def article_certificate(request, article_id):
-    """Generate and download article indexing certificate PDF using existing cert.pdf template"""
-    from django.shortcuts import get_object_or_404
-    from django.http import HttpResponse
-    from reportlab.lib.pagesizes import letter
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.units import inch
-    from reportlab.lib.colors import HexColor
+    """Download the article indexing certificate PDF, rendered over the cert.pdf template on first request"""
+    from django.http import FileResponse
     from datetime import datetime
-    from PyPDF2 import PdfReader, PdfWriter
-    from reportlab.pdfgen import canvas
     from io import BytesIO
-    import os
-    from django.conf import settings
+    from app import certificates
     
     # Get article data (similar to article_detail)
+    article_link = request.build_absolute_uri(f'/indexed_articles/view/{article_id}/')
+    filename = f'article_certificate_{article_id}.pdf'
     try:
         article = Article.objects.get(id=article_id)
-        authors_list = article.authors.all().order_by('order')
-        authors_names = ', '.join([author.name for author in authors_list]) if authors_list.exists() else article.authors_names or 'N/A'
-        article_number = f"SIS{article.id:06d}AI{article.created_at.strftime('%d%m%y') if article.created_at else '000000'}"
-        recorded_by = "Metascholar Limited"
-        volume = article.volume or 'N/A'
-        issue = article.issue or 'N/A'
-        pages = article.pages or 'N/A'
-        date_of_indexing = article.created_at.strftime('%B %d %Y') if article.created_at else datetime.now().strftime('%B %d %Y')
-        article_link = request.build_absolute_uri(f'/indexed_articles/view/{article.id}/')
-        article_title = article.title
     except Article.DoesNotExist:
         # Handle dummy articles
-        from datetime import date
         dummy_articles = {
             1: {'title': 'Blood-Pressure Targets in Comatose Survivors of Cardiac Arrest', 'article_number': 'SIS123456AI141125', 'volume': '10', 'issue': '4', 'pages': '123-130', 'authors': [{'name': 'Dr. Sarah Johnson'}, {'name': 'Dr. Michael Chen'}, {'name': 'Dr. Emily Rodriguez'}]},
             2: {'title': 'Perceptions of School Administrators and Teachers on Educational Technology Integration', 'article_number': 'SIS789012ED150126', 'volume': '8', 'issue': '3', 'pages': '45-62', 'authors': [{'name': 'Dr. Robert Williams'}, {'name': 'Dr. Lisa Anderson'}]},
@@ -485,178 +496,78 @@ def article_certificate(request, article_id):
             4: {'title': 'Weekly Icodec versus Daily Glargine U100 in Type 2 Diabetes', 'article_number': 'SIS456789EN170128', 'volume': '15', 'issue': '1', 'pages': '78-95', 'authors': [{'name': 'Dr. Jennifer Lee'}, {'name': 'Dr. Christopher Brown'}]},
         }
         dummy_data = dummy_articles.get(article_id, dummy_articles[1])
-        authors_names = ', '.join([a['name'] for a in dummy_data['authors']])
-        article_number = dummy_data['article_number']
-        recorded_by = "Metascholar Limited"
-        volume = dummy_data['volume']
-        issue = dummy_data['issue']
-        pages = dummy_data['pages']
-        date_of_indexing = datetime.now().strftime('%B %d %Y')
-        article_link = request.build_absolute_uri(f'/indexed_articles/view/{article_id}/')
-        article_title = dummy_data['title']
-    
-    # Load existing cert.pdf template
-    cert_template_path = os.path.join(settings.BASE_DIR, 'app', 'static', 'app', 'docs', 'cert.pdf')
-    
-    # Create a BytesIO buffer for the overlay
-    overlay_buffer = BytesIO()
-    overlay_canvas = canvas.Canvas(overlay_buffer, pagesize=letter)
-    width, height = letter
-    
-    # Set font and color for text overlay - use serif fonts for professional look
-    overlay_canvas.setFillColor(HexColor('#000000'))
-    
-    # Use Times-Roman (serif) for a more professional certificate look
-    from reportlab.lib.utils import simpleSplit
-    
-    # Starting Y position for article details section - moved up to avoid signatures
-    start_y = height - 3.5 * inch
-    line_height = 22  # Reduced line height for tighter spacing
-    
-    # Authors field with label - bold and stylish, very tight spacing like attached
-    overlay_canvas.setFont("Times-Bold", 12)
-    authors_label_x = 1.5 * inch
-    overlay_canvas.drawString(authors_label_x, start_y, "Authors:")
-    overlay_canvas.setFont("Times-Roman", 12)
-    overlay_canvas.drawString(authors_label_x + 0.85 * inch, start_y, authors_names)
-    
-    # Article Number with label
-    overlay_canvas.setFont("Times-Bold", 12)
-    article_num_label_x = 1.5 * inch
-    overlay_canvas.drawString(article_num_label_x, start_y - line_height, "Article Number:")
-    overlay_canvas.setFont("Times-Roman", 12)
-    overlay_canvas.drawString(article_num_label_x + 1.4 * inch, start_y - line_height, article_number)
-    
-    # Recorded By with label
-    overlay_canvas.setFont("Times-Bold", 12)
-    recorded_label_x = 1.5 * inch
-    overlay_canvas.drawString(recorded_label_x, start_y - (line_height * 2), "Recorded By:")
-    overlay_canvas.setFont("Times-Roman", 12)
-    overlay_canvas.drawString(recorded_label_x + 1.2 * inch, start_y - (line_height * 2), recorded_by)
-    
-    # URL with label
-    overlay_canvas.setFont("Times-Bold", 12)
-    url_label_x = 1.5 * inch
-    overlay_canvas.drawString(url_label_x, start_y - (line_height * 3), "URL:")
-    overlay_canvas.setFont("Times-Roman", 12)
-    overlay_canvas.drawString(url_label_x + 0.45 * inch, start_y - (line_height * 3), "www.scholarindexing.com")
-    
-    # Volume, Issue, Pages on same line with labels - very tight spacing
-    vol_issue_y = start_y - (line_height * 4)
-    overlay_canvas.setFont("Times-Bold", 12)
-    vol_label_x = 1.5 * inch
-    overlay_canvas.drawString(vol_label_x, vol_issue_y, "Volume:")
-    overlay_canvas.setFont("Times-Roman", 12)
-    overlay_canvas.drawString(vol_label_x + 0.7 * inch, vol_issue_y, volume)
-    
-    overlay_canvas.setFont("Times-Bold", 12)
-    issue_label_x = 2.9 * inch
-    overlay_canvas.drawString(issue_label_x, vol_issue_y, "Issue:")
-    overlay_canvas.setFont("Times-Roman", 12)
-    overlay_canvas.drawString(issue_label_x + 0.55 * inch, vol_issue_y, issue)
-    
-    overlay_canvas.setFont("Times-Bold", 12)
-    pages_label_x = 4.7 * inch
-    overlay_canvas.drawString(pages_label_x, vol_issue_y, "Pages:")
-    overlay_canvas.setFont("Times-Roman", 12)
-    overlay_canvas.drawString(pages_label_x + 0.6 * inch, vol_issue_y, pages)
-    
-    # Article Title Acknowledgment (wrapped text) - moved up, bold and larger font, with space before
-    ack_y = start_y - (line_height * 5.2) - 20  # Added 20 points of space before
-    ack_text = f'This certificate acknowledges that the article titled "{article_title}" has been successfully indexed and recorded by Metascholar Limited.'
-    wrapped_ack = simpleSplit(ack_text, "Times-Bold", 13, width - 3*inch)
-    for i, line in enumerate(wrapped_ack):
-        overlay_canvas.setFont("Times-Bold", 13)
-        overlay_canvas.drawString(1.5 * inch, ack_y - (i * 16), line)
-    
-    # Date of Indexing with label - moved up (adjusted for new line spacing), very tight spacing like attached
-    date_y = ack_y - len(wrapped_ack) * 16 - 25
-    overlay_canvas.setFont("Times-Bold", 12)
-    date_label_x = 1.5 * inch
-    overlay_canvas.drawString(date_label_x, date_y, "Date of Indexing:")
-    overlay_canvas.setFont("Times-Roman", 12)
-    overlay_canvas.drawString(date_label_x + 1.25 * inch, date_y, date_of_indexing)
-    
-    # Article Link with label - moved up, extremely tight spacing like attached
-    link_y = date_y - line_height
-    overlay_canvas.setFont("Times-Bold", 12)
-    link_label_x = 1.5 * inch
-    overlay_canvas.drawString(link_label_x, link_y, "Article Link:")
-    overlay_canvas.setFont("Times-Roman", 11)
-    link_wrapped = simpleSplit(article_link, "Times-Roman", 11, width - (link_label_x + 1.25*inch))
-    for i, line in enumerate(link_wrapped):
-        overlay_canvas.drawString(link_label_x + 1.25 * inch, link_y - (i * 13), line)
-    
-    overlay_canvas.save()
-    
-    # Read the existing cert.pdf template
-    try:
-        with open(cert_template_path, 'rb') as template_file:
-            template_reader = PdfReader(template_file)
-            template_writer = PdfWriter()
-            
-            # Get the first page of the template
-            template_page = template_reader.pages[0]
-            
-            # Read the overlay PDF
-            overlay_buffer.seek(0)
-            overlay_reader = PdfReader(overlay_buffer)
-            overlay_page = overlay_reader.pages[0]
-            
-            # Merge overlay onto template page
-            template_page.merge_page(overlay_page)
-            
-            # Add the merged page to writer
-            template_writer.add_page(template_page)
-            
-            # Create response
-            response = HttpResponse(content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="article_certificate_{article_id}.pdf"'
-            
-            # Write to response
-            output_buffer = BytesIO()
-            template_writer.write(output_buffer)
-            output_buffer.seek(0)
-            response.write(output_buffer.read())
-            
-            return response
-    except FileNotFoundError:
-        # If cert.pdf doesn't exist, create a new PDF (fallback)
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="article_certificate_{article_id}.pdf"'
-        
-        p = canvas.Canvas(response, pagesize=letter)
-        width, height = letter
-        
-        # Draw basic certificate structure
-        p.setFont("Helvetica-Bold", 20)
-        p.drawCentredString(width/2, height - 1.5 * inch, "ARTICLE INDEXING CERTIFICATE")
-        
-        # Add article data
-        p.setFont("Helvetica", 11)
-        p.drawString(1.5 * inch, height - 3 * inch, f"Authors: {authors_names}")
-        p.drawString(1.5 * inch, height - 3.25 * inch, f"Article Number: {article_number}")
-        p.drawString(1.5 * inch, height - 3.5 * inch, f"Volume: {volume}, Issue: {issue}, Pages: {pages}")
-        p.drawString(1.5 * inch, height - 4 * inch, f"Date of Indexing: {date_of_indexing}")
-        p.drawString(1.5 * inch, height - 4.25 * inch, f"Article Link: {article_link}")
-        
-        # Article title acknowledgment
-        ack_text = f'This certificate acknowledges that the article titled "{article_title}" has been successfully indexed and recorded by Metascholar Limited.'
-        wrapped_ack = simpleSplit(ack_text, "Helvetica", 11, width - 3*inch)
-        for i, line in enumerate(wrapped_ack):
-            p.drawString(1.5 * inch, height - 4.5 * inch - (i * 15), line)
-        
-        p.showPage()
-        p.save()
-        
-        return response
+        fields = {
+            'authors_names': ', '.join([a['name'] for a in dummy_data['authors']]),
+            'article_number': dummy_data['article_number'],
+            'recorded_by': certificates.RECORDED_BY,
+            'volume': dummy_data['volume'],
+            'issue': dummy_data['issue'],
+            'pages': dummy_data['pages'],
+            'date_of_indexing': datetime.now().strftime('%B %d %Y'),
+            'article_link': article_link,
+            'article_title': dummy_data['title'],
+        }
+        # Rendered on the fly: only real articles get a stored copy, or any made-up id would fill the disk
+        return FileResponse(
+            BytesIO(certificates.render_certificate(fields)),
+            as_attachment=True,
+            filename=filename,
+            content_type='application/pdf',
+        )
+    
+    # Stored certificates are keyed on the printed fields, so a repeat download is a file read
+    fields = certificates.article_fields(article, article_link)
+    return FileResponse(
+        certificates.open_certificate(article_id, fields),
+        as_attachment=True,
+        filename=filename,
+        content_type='application/pdf',
+    )
+
+@login_required
+def bulk_article_certificates(request):
+    """Stream a ZIP of the certificates of every indexed article matching the journal_name/volume/issue/year filters (staff only)"""
+    from django.http import StreamingHttpResponse
+    from app import certificates
+    
+    if not (request.user.is_superuser or request.user.is_staff):
+        return HttpResponse('Permission denied. Only staff/superusers can download certificates in bulk.', status=403)
+    
+    filters = {name: request.GET.get(name, '').strip() for name in certificates.BULK_FILTERS}
+    filters = {name: value for name, value in filters.items() if value}
+    if not filters:
+        return HttpResponse('Give at least one of journal_name, volume, issue or year.', status=400)
+    if 'year' in filters and not filters['year'].isdigit():
+        return HttpResponse('Year must be a number.', status=400)
+    
+    articles = certificates.filtered_articles(**filters)
+    base_url = request.build_absolute_uri('/').rstrip('/')
+    response = StreamingHttpResponse(
+        certificates.zip_stream(certificates.bulk_certificates(articles, base_url)),
+        content_type='application/zip',
+    )
+    response['Content-Disposition'] = 'attachment; filename="article_certificates.zip"'
+    return response
 
 @check_page_enabled('enable_indexed_journals_page')
+@cache_for_anonymous(Journal, JournalEditor)
 def indexed_journals(request):
     """Indexed Journals page view"""
     journals = Journal.objects.all().order_by('-created_at')
     return render(request, 'app/indexed_journals.html', {'journals': journals})
 
+def _journal_etag(request, journal_id):
+    """ETag from the journal's updated_at, its editor count and the journal/editor page generations"""
+    row = Journal.objects.filter(id=journal_id).annotate(
+        editor_count=Count('editors')
+    ).values_list('updated_at', 'editor_count').first()
+    if row is None:
+        return None
+    updated_at, editor_count = row
+    return page_cache.page_etag(request, updated_at, editor_count, page_cache.generations((Journal, JournalEditor)))
+
+@cache_for_anonymous(Journal, JournalEditor)
+@conditional_page(_journal_etag)
 def journal_detail(request, journal_id):
     """Journal detail page view"""
     from django.shortcuts import get_object_or_404
@@ -695,8 +606,6 @@ def journal_detail(request, journal_id):
 @check_page_enabled('enable_project_archive_page')
 def project_archive(request):
     """Project | Research Archive page view"""
-    projects = Project.objects.all()
-    
     # Get filter parameters from GET request
     search_query = request.GET.get('search', '').strip()
     category = request.GET.get('category', '').strip()
@@ -705,67 +614,80 @@ def project_archive(request):
     year = request.GET.get('year', '').strip()
     sort_by = request.GET.get('sort', 'recent')
     
-    # Apply search filter
-    if search_query:
-        projects = projects.filter(
-            Q(project_title__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(institution__icontains=search_query) |
-            Q(category__icontains=search_query)
-        )
-    
-    # Apply category filter
-    if category:
-        projects = projects.filter(category__icontains=category)
+    # Exact-match category/institution/status/year filters (indexed columns)
+    selected = project_facets.selected_from_params(request.GET)
+    filters = project_facets.filter_q(selected)
     
-    # Apply institution filter
-    if institution:
-        projects = projects.filter(institution__icontains=institution)
-    
-    # Apply status filter
-    if status:
-        projects = projects.filter(status=status)
-    
-    # Apply year filter
-    if year:
-        projects = projects.filter(created_at__year=year)
-    
-    # Apply sorting
-    if sort_by == 'recent':
-        projects = projects.order_by('-created_at')
-    elif sort_by == 'oldest':
-        projects = projects.order_by('created_at')
-    elif sort_by == 'title':
-        projects = projects.order_by('project_title')
+    cursor = request.GET.get('cursor')
+    if search_query:
+        # Search results are ranked by relevance, 20 per page
+        page = search(search_query, kinds=['project'], filters={'project': filters}, limit=20, cursor=cursor)
+        projects = [hit.object for hit in page.hits]
+        next_cursor = page.next_cursor
+        sort_by = 'relevance'
     else:
-        projects = projects.order_by('-created_at')
+        # Apply sorting, with id as tie-breaker so the cursor is unambiguous
+        if sort_by == 'oldest':
+            ordering = ('created_at', 'id')
+        elif sort_by == 'title':
+            ordering = ('project_title', 'id')
+        else:
+            sort_by = 'recent'
+            ordering = ('-created_at', '-id')
+        page = keyset_paginate(Project.objects.filter(filters), ordering, 20, cursor)
+        projects = page.items
+        next_cursor = page.next_cursor
+    prefetch_related_objects(projects, 'contributors')
     
-    # Get unique values for filter dropdowns
-    institutions = Project.objects.values_list('institution', flat=True).distinct().order_by('institution')
-    categories = Project.objects.values_list('category', flat=True).distinct().order_by('category')
-    years = Project.objects.dates('created_at', 'year', order='DESC')
+    # Filter dropdown values with counts, from the cached facet snapshot
+    facet_counts = project_facets.counts(selected)
     
     return render(request, 'app/project_archive.html', {
         'projects': projects,
-        'institutions': institutions,
-        'categories': categories,
-        'years': years,
+        'institutions': facet_counts.values['institution'],
+        'categories': facet_counts.values['category'],
+        'years': facet_counts.values['year'],
+        'status_counts': {item['name']: item['count'] for item in facet_counts.values['status']},
         'current_search': search_query,
         'current_category': category,
         'current_institution': institution,
         'current_status': status,
         'current_year': year,
         'current_sort': sort_by,
+        'next_page_url': _with_cursor(request, next_cursor),
     })
 
+def _count_project_view(request, project_id):
+    """Count a project page view, including 304s; the id comes from the URL, so no query is needed"""
+    view_counts.add(Project, project_id)
+
+def _project_etag(request, project_id):
+    """ETag from the project's updated_at, its contributor count and the project page generations.
+
+    Visitors with a payment email in their session see their payment status,
+    so their page is always rendered.
+    """
+    if request.session.get('payment_email'):
+        return None
+    row = Project.objects.filter(id=project_id).annotate(
+        contributor_count=Count('contributors')
+    ).values_list('updated_at', 'contributor_count').first()
+    if row is None:
+        return None
+    updated_at, contributor_count = row
+    return page_cache.page_etag(
+        request, updated_at, contributor_count, page_cache.generations((Project, ProjectContributor))
+    )
+
 @check_page_enabled('enable_project_archive_page')
+@conditional_page(_project_etag, on_not_modified=_count_project_view)
 def project_detail(request, project_id):
     """Project detail page view"""
     project = get_object_or_404(Project, id=project_id)
     
-    # Increment views
-    project.views += 1
-    project.save(update_fields=['views'])
+    # Increment views (shown including the ones not written yet)
+    _count_project_view(request, project_id)
+    project.views += view_counts.pending(Project, project.id)
     
     # Get project author (submitted_by)
     author = project.submitted_by
@@ -978,9 +900,8 @@ def verify_project_payment(request, project_id):
                             payment.document_sent = True
                             payment.save()
                             
-                            # Increment downloads
-                            project.downloads += 1
-                            project.save(update_fields=['downloads'])
+                            # Increment downloads (buffered, written in the next batch)
+                            view_counts.add(Project, project.id, event='download')
                             
                             # Store email in session
                             request.session['payment_email'] = email
@@ -1255,35 +1176,37 @@ def directory_researchers(request):
     discipline = request.GET.get('discipline', '').strip()
     sort_by = request.GET.get('sort', 'recent')
     
-    # Apply search filter
-    if search_query:
-        researchers = researchers.filter(
-            Q(first_name__icontains=search_query) |
-            Q(last_name__icontains=search_query) |
-            Q(institution__icontains=search_query) |
-            Q(position__icontains=search_query) |
-            Q(research_areas__icontains=search_query)
-        )
+    filters = Q()
     
     # Apply country filter
     if country:
-        researchers = researchers.filter(country__icontains=country)
+        filters &= Q(country__icontains=country)
     
     # Apply institution filter
     if institution:
-        researchers = researchers.filter(institution__icontains=institution)
+        filters &= Q(institution__icontains=institution)
     
-    # Apply discipline/research area filter
+    # Apply discipline/research area filter (exact match on the research area tags)
     if discipline:
-        researchers = researchers.filter(research_areas__icontains=discipline)
+        filters &= Q(areas__key=discipline.lower())
     
-    # Apply sorting
-    if sort_by == 'name':
-        researchers = researchers.order_by('first_name', 'last_name')
-    elif sort_by == 'recent':
-        researchers = researchers.order_by('-created_at')
+    next_page_url = None
+    if search_query:
+        # Search results are ranked by relevance, 20 per page
+        page = search(search_query, kinds=['researcher'], filters={'researcher': filters}, limit=20, cursor=request.GET.get('cursor'))
+        researchers = [hit.object for hit in page.hits]
+        next_page_url = _with_cursor(request, page.next_cursor)
+        sort_by = 'relevance'
     else:
-        researchers = researchers.order_by('-created_at')
+        researchers = researchers.filter(filters)
+        
+        # Apply sorting
+        if sort_by == 'name':
+            researchers = researchers.order_by('first_name', 'last_name')
+        elif sort_by == 'recent':
+            researchers = researchers.order_by('-created_at')
+        else:
+            researchers = researchers.order_by('-created_at')
     
     # Get unique values for filter dropdowns
     from django.db.models import Count
@@ -1293,38 +1216,11 @@ def directory_researchers(request):
     institutions = DirectoryApplication.objects.filter(terms_accepted=True).exclude(institution='').values('institution').annotate(count=Count('id')).order_by('institution')
     institutions_list = [{'name': i['institution'], 'count': i['count']} for i in institutions if i['institution']]
     
-    # Predefined areas of interest
-    areas_of_interest = [
-        'Music education, Community music, Applied ethnomusicology, Secondary school music curricula, Intercultural relations and organised cultural encounters',
-        'Brain Computer, Interface Biomedical, Signal Processing, Machine Learning, Deep Learning, Artificial Intelligence',
-        'Artificial Intelligence, Machine Learning, Deep Learning',
-        'Populations of bacteria, Evolution of symbioses',
-        'Water security, water resources management, climate change impact',
-        'Smoking cessation, Harm reduction, Evidence synthesis',
-        'Time Series Econometrics, Forecasting, Macroeconometrics',
-        'Strategic Communications, Marketing & Communications',
-        'Chartered Accountant',
-        'Chemical ecology and management of agricultural pests for sustainable crop production, postharvest technology for food security',
-        'Theology, Environmental health, Community health, Epidemiology',
-        'Education, Curriculum studies, leadership studies, social policy, teaching',
-        'Organisation and Human Development, Management, General Education',
-        'Epidemiology, Occupational Health & Safety',
-        'Data analysis, EHR global health, health policy, and information management research skills/knowledge',
-        'Non-communicable diseases, mental health care',
-        'Public Health',
-        'Health Economics, Behavioral Economics, Public Economics, Industrial Organization',
-        'Finance, Banking, Economics',
-        'Time Series Analysis, Empirical Finance, Financial Markets, Corporate Finance, Digital Assets & FinTech',
-    ]
-    
-    # Count researchers for each area of interest (show all areas, sorted by count descending)
-    areas_with_count = []
-    for area in areas_of_interest:
-        count = DirectoryApplication.objects.filter(terms_accepted=True, research_areas__icontains=area).count()
-        areas_with_count.append({'name': area, 'count': count})
+    # Most common research areas with researcher counts (one cached GROUP BY)
+    areas_with_count = research_area_counts(20)
     
-    # Sort by count descending (highest to smallest)
-    areas_with_count.sort(key=lambda x: x['count'], reverse=True)
+    # Research area tags of the listed researchers, for client-side filtering
+    prefetch_related_objects(researchers, 'areas')
     
     return render(request, 'app/directory_researchers.html', {
         'researchers': researchers,
@@ -1336,6 +1232,7 @@ def directory_researchers(request):
         'current_institution': institution,
         'current_discipline': discipline,
         'current_sort': sort_by,
+        'next_page_url': next_page_url,
     })
 
 @login_required
@@ -1412,11 +1309,13 @@ def upload_project(request):
     return render(request, 'app/upload_project.html', {'form': form})
 
 @check_page_enabled('enable_council_members_page')
+@prerendered
 def council_members(request):
     """Council Members page view"""
     return render(request, 'app/council_members.html')
 
 @check_page_enabled('enable_team_members_page')
+@prerendered
 def team_members(request):
     """Team Members page view"""
     return render(request, 'app/team_members.html')
@@ -1664,6 +1563,7 @@ def apply_directory(request):
                 application = form.save(commit=False)
                 application.submitted_by = request.user if request.user.is_authenticated else None
                 application.save()
+                application.sync_research_areas()
                 messages.success(request, 'Your application has been submitted successfully!')
                 return redirect('app:directory_researchers')
             else:
@@ -1879,35 +1779,42 @@ def powerpoint_preparation(request):
     return render(request, 'app/powerpoint_preparation.html', {'form': form})
 
 @check_page_enabled('enable_about_sis_page')
+@prerendered
 def about_sis(request):
     """About S.I.S page view"""
     return render(request, 'app/about_sis.html')
 
 @check_page_enabled('enable_mission_page')
+@prerendered
 def mission(request):
     """Mission page view"""
     return render(request, 'app/mission.html')
 
 @check_page_enabled('enable_criteria_page')
+@prerendered
 def criteria(request):
     """Criteria page view"""
     return render(request, 'app/criteria.html')
 
 @check_page_enabled('enable_tolerance_policy_page')
+@prerendered
 def tolerance_policy(request):
     """Tolerance Policy page view"""
     return render(request, 'app/tolerance_policy.html')
 
 @check_page_enabled('enable_service_solution_page')
+@prerendered
 def service_solution(request):
     """Service & Solution page view"""
     return render(request, 'app/service_solution.html')
 
 @check_page_enabled('enable_policy_terms_page')
+@prerendered
 def policy_terms(request):
     """Policy Terms and Conditions page view"""
     return render(request, 'app/policy_terms.html')
 
+@cache_for_anonymous(NewsArticle, NewsTag)
 def news(request):
     """News page view with Latest News, Top Tags, and Recommended News"""
     # Get latest news articles (10 for the grid)
@@ -1953,41 +1860,56 @@ def load_more_tags(request):
 
 def browse_all_news(request):
     """Browse all news with search and filter functionality"""
-    from django.db.models import Q
     from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
     
     # Get all published news articles
     articles = NewsArticle.objects.filter(is_published=True)
     
-    # Search functionality
     search_query = request.GET.get('search', '').strip()
-    if search_query:
-        articles = articles.filter(
-            Q(title__icontains=search_query) |
-            Q(content__icontains=search_query) |
-            Q(excerpt__icontains=search_query)
-        )
     
     # Filter by tag
     tag_filter = request.GET.get('tag', '')
     selected_tag_obj = None
+    tag_q = Q()
     if tag_filter:
         try:
             selected_tag_obj = NewsTag.objects.get(id=tag_filter, is_active=True)
-            articles = articles.filter(tags__id=tag_filter)
-        except NewsTag.DoesNotExist:
+            # Semi-join on the tag link table, so no DISTINCT is needed
+            tag_q = Q(Exists(NewsArticle.tags.through.objects.filter(
+                newsarticle_id=OuterRef('pk'), newstag_id=selected_tag_obj.id
+            )))
+        except (NewsTag.DoesNotExist, ValueError):
             tag_filter = ''
     
     # Filter by date range (optional - can be added later)
     # date_from = request.GET.get('date_from', '')
     # date_to = request.GET.get('date_to', '')
     
-    # Order by published date (newest first)
-    articles = articles.order_by('-published_date').distinct()
-    
     # Get all active tags for filter dropdown
     all_tags = NewsTag.objects.filter(is_active=True).order_by('name')
     
+    # Search functionality - ranked matches with highlighted extracts, 15 per page
+    if search_query:
+        page = search(search_query, kinds=['news'], filters={'news': tag_q}, limit=15,
+                      cursor=request.GET.get('cursor'), snippet_column='body')
+        results = []
+        for hit in page.hits:
+            hit.object.search_snippet = hit.snippet
+            results.append(hit.object)
+        prefetch_related_objects(results, 'tags')
+        return render(request, 'app/browse_all_news.html', {
+            'articles': results,
+            'page_obj': None,
+            'next_page_url': _with_cursor(request, page.next_cursor),
+            'all_tags': all_tags,
+            'search_query': search_query,
+            'selected_tag': tag_filter,
+            'selected_tag_obj': selected_tag_obj,
+        })
+    
+    # Order by published date (newest first)
+    articles = articles.filter(tag_q).order_by('-published_date').prefetch_related('tags')
+    
     # Pagination - 15 articles per page
     paginator = Paginator(articles, 15)
     page = request.GET.get('page', 1)
@@ -2008,6 +1930,16 @@ def browse_all_news(request):
         'selected_tag_obj': selected_tag_obj,
     })
 
+def _autocomplete_result(entry, clean_text):
+    """Build one hero autocomplete entry from a title index entry"""
+    if entry.kind == 'article':
+        return {'title': clean_text(entry.title), 'type': 'Indexed Articles', 'url': f'/indexed_articles/view/{entry.id}/', 'requires_auth': False}
+    if entry.kind == 'journal':
+        return {'title': clean_text(entry.title), 'type': 'Indexed Journals', 'url': f'/indexed_journals/view/{entry.id}/', 'requires_auth': False}
+    if entry.kind == 'project':
+        return {'title': clean_text(entry.title), 'type': 'Project | Research Archive', 'url': f'/project_archive/view/{entry.id}/', 'requires_auth': False}
+    return {'title': clean_text(entry.title), 'type': 'News', 'url': f'/news/{entry.slug}/', 'requires_auth': False}
+
 def hero_autocomplete(request):
     """Autocomplete API endpoint for hero search - searches only: Indexed Articles, Indexed Journals, Project Archive, and News"""
     from django.utils.html import strip_tags
@@ -2018,6 +1950,10 @@ def hero_autocomplete(request):
     if len(query) < 2:
         return JsonResponse({'success': False, 'results': []})
     
+    cached = autocomplete_cache.get_response(query)
+    if cached is not None:
+        return JsonResponse(cached)
+    
     def clean_text(text):
         """Remove HTML tags and code snippets from text"""
         if not text:
@@ -2036,107 +1972,28 @@ def hero_autocomplete(request):
     
     results = []
     
-    # 1. Search Indexed Articles
-    articles = Article.objects.filter(
-        status__in=['approved', 'pending']  # Only show approved/pending articles
-    ).filter(
-        Q(title__icontains=query) | 
-        Q(abstract__icontains=query) | 
-        Q(keywords__icontains=query) |
-        Q(authors_names__icontains=query) |
-        Q(journal_name__icontains=query) |
-        Q(discipline__icontains=query)
-    )[:8]  # Get more results per category
-    for article in articles:
-        results.append({
-            'title': clean_text(article.title),
-            'type': 'Indexed Articles',
-            'url': f'/indexed_articles/view/{article.id}/',
-            'requires_auth': False
-        })
-    
-    # 2. Search Indexed Journals
-    journals = Journal.objects.filter(
-        Q(journal_name__icontains=query) | 
-        Q(journal_scope__icontains=query) |
-        Q(publisher_name__icontains=query) |
-        Q(issn_print__icontains=query) |
-        Q(issn_online__icontains=query) |
-        Q(e_issn__icontains=query) |
-        Q(subject_area__icontains=query)
-    )[:8]
-    for journal in journals:
-        results.append({
-            'title': clean_text(journal.journal_name),
-            'type': 'Indexed Journals',
-            'url': f'/indexed_journals/view/{journal.id}/',
-            'requires_auth': False
-        })
-    
-    # 3. Search Project | Research Archive
-    projects = Project.objects.filter(
-        Q(project_title__icontains=query) | 
-        Q(description__icontains=query) |
-        Q(category__icontains=query) |
-        Q(institution__icontains=query)
-    )[:8]
-    for project in projects:
-        results.append({
-            'title': clean_text(project.project_title),
-            'type': 'Project | Research Archive',
-            'url': f'/project_archive/view/{project.id}/',
-            'requires_auth': False
-        })
+    # Title prefix matches from the in-memory index, best matches first
+    per_kind = {}
+    for entry in title_index.lookup(query, limit=32):
+        # Keep at most 8 results per category
+        if per_kind.get(entry.kind, 0) >= 8:
+            continue
+        per_kind[entry.kind] = per_kind.get(entry.kind, 0) + 1
+        results.append(_autocomplete_result(entry, clean_text))
     
-    # 4. Search News Page
-    # Search in title, excerpt, content, and tags
-    query_lower = query.lower()
-    
-    # If query contains "news" or "article", also show some recent news articles
-    if 'news' in query_lower or 'article' in query_lower:
-        # Get matching articles first
-        news_articles = NewsArticle.objects.filter(
-            is_published=True
-        ).filter(
-            Q(title__icontains=query) | 
-            Q(excerpt__icontains=query) |
-            Q(content__icontains=query) |
-            Q(tags__name__icontains=query)
-        ).distinct()[:8]
-        
-        # If no matches but query contains "news", show recent articles
-        if not news_articles.exists() and 'news' in query_lower:
-            news_articles = NewsArticle.objects.filter(
-                is_published=True
-            ).order_by('-published_date')[:8]
-    else:
-        # Regular search
-        news_articles = NewsArticle.objects.filter(
-            is_published=True
-        ).filter(
-            Q(title__icontains=query) | 
-            Q(excerpt__icontains=query) |
-            Q(content__icontains=query) |
-            Q(tags__name__icontains=query)
-        ).distinct()[:8]
-    
-    for news in news_articles:
-        results.append({
-            'title': clean_text(news.title),
-            'type': 'News',
-            'url': f'/news/{news.slug}/',
-            'requires_auth': False
-        })
+    # If the query mentions news but nothing matched, show recent news articles
+    if not per_kind.get('news') and 'news' in query.lower():
+        for entry in title_index.recent_news(8):
+            results.append(_autocomplete_result(entry, clean_text))
     
-    # Limit total results and sort by relevance (prioritize title matches)
-    # Sort: title matches first, then other matches
-    results.sort(key=lambda x: (not x['title'].lower().startswith(query.lower()), x['title']))
     results = results[:20]  # Show up to 20 results total
     
-    return JsonResponse({
+    payload = {
         'success': True,
         'results': results
-    })
+    }
+    autocomplete_cache.set_response(query, payload)
+    return JsonResponse(payload)
 
 @login_required
 def create_news(request):
@@ -2214,13 +2071,41 @@ def create_news(request):
         'predefined_tags': predefined_tags
     })
 
+def _count_news_view(request, slug):
+    """Count a view of a published article served as a 304 or from the page cache, looking its pk up by slug"""
+    pk = NewsArticle.objects.filter(slug=slug, is_published=True).values_list('pk', flat=True).first()
+    if pk is not None:
+        view_counts.add(NewsArticle, pk)
+
+def _news_etag(request, slug):
+    """ETag from the article's and its newest comment's updated_at, tag and comment counts,
+    the reader's bookmark and page generations"""
+    if request.user.is_authenticated:
+        bookmarked = Exists(NewsBookmark.objects.filter(user=request.user, article=OuterRef('pk')))
+    else:
+        bookmarked = Value(False, output_field=BooleanField())
+    row = NewsArticle.objects.filter(slug=slug, is_published=True).annotate(
+        tag_count=Count('tags', distinct=True),
+        comment_count=Count('comments', distinct=True),
+        commented_at=Max('comments__updated_at'),
+        bookmarked=bookmarked,
+    ).values_list('updated_at', 'tag_count', 'comment_count', 'commented_at', 'bookmarked').first()
+    if row is None:
+        return None
+    updated_at, tag_count, comment_count, commented_at, bookmarked = row
+    changed_at = max(updated_at, commented_at) if commented_at else updated_at
+    generations = page_cache.generations((NewsArticle, NewsTag, NewsWriter, NewsComment))
+    return page_cache.page_etag(request, changed_at, tag_count, comment_count, bookmarked, generations)
+
+@cache_for_anonymous(NewsArticle, NewsTag, NewsWriter, NewsComment, on_hit=_count_news_view)
+@conditional_page(_news_etag, on_not_modified=_count_news_view)
 def news_detail(request, slug):
     """News article detail page"""
     article = get_object_or_404(NewsArticle, slug=slug, is_published=True)
     
-    # Increment view count
-    article.view_count += 1
-    article.save(update_fields=['view_count'])
+    # Increment view count (shown including the ones not written yet)
+    view_counts.add(NewsArticle, article.pk)
+    article.view_count += view_counts.pending(NewsArticle, article.pk)
     
     # Get sidebar articles (other published articles, excluding current)
     sidebar_articles = NewsArticle.objects.filter(
@@ -2233,12 +2118,8 @@ def news_detail(request, slug):
         is_published=True
     ).exclude(id=article.id).distinct()[:4]
     
-    # Get approved comments (top-level only, replies are loaded via AJAX)
-    comments = NewsComment.objects.filter(
-        article=article,
-        parent=None,
-        is_approved=True
-    ).order_by('-created_at')
+    # One page of approved top-level comments (replies are loaded via AJAX)
+    thread = load_thread(article, request.user, cursor=request.GET.get('cursor'))
     
     # Check if user has bookmarked this article
     is_bookmarked = False
@@ -2249,7 +2130,9 @@ def news_detail(request, slug):
         'article': article,
         'sidebar_articles': sidebar_articles,
         'related_articles': related_articles,
-        'comments': comments,
+        'comments': thread.comments,
+        'comments_total': thread.total,
+        'more_comments_url': _with_cursor(request, thread.next_cursor),
         'is_bookmarked': is_bookmarked,
     })
 
@@ -2279,19 +2162,14 @@ def like_news_comment(request, comment_id):
     """Like or unlike a comment"""
     comment = get_object_or_404(NewsComment, id=comment_id, is_approved=True)
     
-    if request.user in comment.likes.all():
-        comment.likes.remove(request.user)
-        action = 'unliked'
-    else:
-        comment.likes.add(request.user)
-        comment.dislikes.remove(request.user)  # Remove from dislikes if present
-        action = 'liked'
+    # Clears any dislike by the same user as well
+    action = 'liked' if comment.toggle_reaction(request.user, 'likes') else 'unliked'
     
     return JsonResponse({
         'success': True,
         'action': action,
-        'likes_count': comment.get_likes_count(),
-        'dislikes_count': comment.get_dislikes_count()
+        'likes_count': comment.likes_count,
+        'dislikes_count': comment.dislikes_count
     })
 
 @login_required
@@ -2299,25 +2177,20 @@ def dislike_news_comment(request, comment_id):
     """Dislike or undislike a comment"""
     comment = get_object_or_404(NewsComment, id=comment_id, is_approved=True)
     
-    if request.user in comment.dislikes.all():
-        comment.dislikes.remove(request.user)
-        action = 'undisliked'
-    else:
-        comment.dislikes.add(request.user)
-        comment.likes.remove(request.user)  # Remove from likes if present
-        action = 'disliked'
+    # Clears any like by the same user as well
+    action = 'disliked' if comment.toggle_reaction(request.user, 'dislikes') else 'undisliked'
     
     return JsonResponse({
         'success': True,
         'action': action,
-        'likes_count': comment.get_likes_count(),
-        'dislikes_count': comment.get_dislikes_count()
+        'likes_count': comment.likes_count,
+        'dislikes_count': comment.dislikes_count
     })
 
 def get_comment_replies(request, comment_id):
     """Get replies for a comment (AJAX)"""
     comment = get_object_or_404(NewsComment, id=comment_id, is_approved=True)
-    replies = comment.replies.filter(is_approved=True).order_by('created_at')
+    replies = with_thread_data(comment.replies.filter(is_approved=True), request.user).order_by('created_at')
     
     replies_data = []
     for reply in replies:
@@ -2326,10 +2199,10 @@ def get_comment_replies(request, comment_id):
             'user': reply.user.username,
             'content': reply.content,
             'created_at': reply.created_at.strftime('%B %d, %Y at %I:%M %p'),
-            'likes_count': reply.get_likes_count(),
-            'dislikes_count': reply.get_dislikes_count(),
-            'user_liked': request.user.is_authenticated and request.user in reply.likes.all(),
-            'user_disliked': request.user.is_authenticated and request.user in reply.dislikes.all(),
+            'likes_count': reply.likes_count,
+            'dislikes_count': reply.dislikes_count,
+            'user_liked': reply.user_liked,
+            'user_disliked': reply.user_disliked,
         })
     
     return JsonResponse({'success': True, 'replies': replies_data})
@@ -3040,7 +2913,7 @@ def settings(request):
     
     # Get site settings
     from app.models import SiteSettings
-    site_settings = SiteSettings.get_settings()
+    site_settings = SiteSettings.for_request(request)
     
     return render(request, 'app/settings.html', {
         'user': user,
@@ -3068,6 +2941,10 @@ def account_detail(request):
 @login_required
 def list_accounts(request):
     """List all accounts page"""
+    import hashlib
+    from django.core.cache import cache
+    from django.db.models.functions import Lower
+    
     # Get search and filter parameters
     search_query = request.GET.get('search', '').strip()
     sort_by = request.GET.get('sort', 'recent')
@@ -3076,8 +2953,8 @@ def list_accounts(request):
     # Get all users with profiles
     users = User.objects.filter(profile__isnull=False).select_related('profile')
     
-    # Get total count before filtering (for display)
-    total_all_users = users.count()
+    # Total before filtering (for display); an approximate, cached count is enough
+    total_all_users = cache.get_or_set('accounts:total', users.count, 300)
     
     # Apply role filter
     if role_filter == 'admin':
@@ -3087,56 +2964,62 @@ def list_accounts(request):
     elif role_filter == 'user':
         users = users.filter(is_staff=False, is_superuser=False)
     
-    # Apply search filter
+    # Apply search filter - case-insensitive prefix match on username or email.
+    # Written as a range on LOWER(column) so the expression indexes are used.
     if search_query:
-        users = users.filter(
-            Q(username__icontains=search_query) |
-            Q(email__icontains=search_query) |
-            Q(first_name__icontains=search_query) |
-            Q(last_name__icontains=search_query)
+        prefix = search_query.lower()
+        users = users.annotate(username_lower=Lower('username'), email_lower=Lower('email')).filter(
+            Q(username_lower__gte=prefix, username_lower__lt=prefix + '\U0010ffff') |
+            Q(email_lower__gte=prefix, email_lower__lt=prefix + '\U0010ffff')
         )
     
-    # Apply sorting
-    if sort_by == 'recent':
-        users = users.order_by('-date_joined')
-    elif sort_by == 'oldest':
-        users = users.order_by('date_joined')
+    # Apply sorting, with id as tie-breaker so the cursor is unambiguous
+    if sort_by == 'oldest':
+        ordering = ('date_joined', 'id')
     elif sort_by == 'name':
-        users = users.order_by('first_name', 'last_name', 'username')
+        ordering = ('first_name', 'last_name', 'username', 'id')
     else:
-        users = users.order_by('-date_joined')
+        sort_by = 'recent'
+        ordering = ('-date_joined', '-id')
     
-    # Pagination
-    from django.core.paginator import Paginator
-    paginator = Paginator(users, 20)  # Show 20 users per page
-    page_number = request.GET.get('page', 1)
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination - 20 users per page
+    page = keyset_paginate(users, ordering, 20, request.GET.get('cursor'))
     
     # Calculate record range
-    start_record = (page_obj.number - 1) * paginator.per_page + 1
-    end_record = min(start_record + paginator.per_page - 1, paginator.count)
-    
-    # Ensure superusers have correct flags (fix any data inconsistencies)
-    # Superusers should have both is_superuser=True and is_staff=True
-    # Also check for users who might be superusers but have wrong flags
-    for user in page_obj:
-        if user.is_superuser:
-            if not user.is_staff:
-                user.is_staff = True
-                user.save(update_fields=['is_staff'])
-        # If user has is_staff=True but is_superuser=False, and they're the first superuser
-        # or have a specific username pattern, we might want to check
-        # For now, we'll let the frontend handle the display fix
+    try:
+        start_record = max(int(request.GET.get('start', 1)), 1)
+    except ValueError:
+        start_record = 1
+    end_record = start_record + len(page.items) - 1
+    if search_query or role_filter:
+        count_key = 'accounts:total:' + hashlib.md5(f'{role_filter}:{search_query.lower()}'.encode()).hexdigest()
+        total_records = cache.get_or_set(count_key, users.count, 300)
+    else:
+        total_records = total_all_users
+    
+    next_page_url = None
+    if page.next_cursor:
+        params = request.GET.copy()
+        params['cursor'] = page.next_cursor
+        params['start'] = end_record + 1
+        next_page_url = f'?{params.urlencode()}'
+    first_page_url = None
+    if request.GET.get('cursor'):
+        params = request.GET.copy()
+        params.pop('cursor', None)
+        params.pop('start', None)
+        first_page_url = f'?{params.urlencode()}'
     
     return render(request, 'app/list_accounts.html', {
-        'page_obj': page_obj,
-        'users': page_obj,
+        'users': page.items,
+        'next_page_url': next_page_url,
+        'first_page_url': first_page_url,
         'current_search': search_query,
         'current_sort': sort_by,
         'current_role': role_filter,
         'start_record': start_record,
         'end_record': end_record,
-        'total_records': paginator.count,
+        'total_records': total_records,
         'total_all_users': total_all_users,
         'has_filters': bool(search_query or role_filter),
     })
@@ -52,6 +52,7 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'app.page_cache.AnonymousPageCacheMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -61,13 +62,21 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'app.context_processors.site_settings',
+                'app.context_processors.fragment_cache',
+            ],
+            # Compile each template once per process and reuse it; under DEBUG
+            # the autoreloader clears this cache whenever a template file changes
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
             ],
         },
     },
@@ -87,6 +96,28 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Must be shared by every worker process: the site settings version, page
+# cache generations, template fragments and search generations live here,
+# and with a per-process cache (LocMemCache) one worker's settings saves and
+# purges would never reach the others. The file cache is shared by the
+# workers of one host; set CACHE_BACKEND/CACHE_LOCATION to Redis or
+# Memcached when serving from several hosts.
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache')
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / 'cache')),
+    }
+}
+if CACHE_BACKEND.endswith('FileBasedCache'):
+    # Cached pages add up quickly; the default of 300 entries would cull constantly
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': 10000}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -145,6 +176,18 @@ LOGIN_REDIRECT_URL = '/'
 PAYSTACK_PUBLIC_KEY = 'pk_test_af37d26c0fa360522c4e66495f3877e498c18850'
 PAYSTACK_SECRET_KEY = 'sk_test_185fc53d96addab7232060c86f4221918ab59d1c'
 
+# Search settings
+# Seconds a cached hero autocomplete response is reused (writes invalidate it sooner)
+AUTOCOMPLETE_CACHE_TIMEOUT = 300
+
+# View counter settings
+# Seconds page views are summed in memory before a background thread writes them (0 writes every view at once)
+VIEW_COUNT_FLUSH_INTERVAL = 10
+
+# Certificate settings
+# Rendered certificate PDFs, one directory per article; safe to delete at any time
+CERTIFICATE_CACHE_ROOT = MEDIA_ROOT / 'certificates'
+
 # Email Configuration - Gmail SMTP settings
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'